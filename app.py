@@ -1,5 +1,6 @@
 from dataclasses import dataclass, field
-from typing import List
+from itertools import chain
+from typing import Iterator, List
 from datetime import datetime
 from transformers import pipeline
 import re
@@ -115,17 +116,17 @@ class Admin(User):
     def approve_bonus(self, user: User, amount: int, type="Бонусные баллы") -> None:
         user.add_credits(amount, type=type)
 
+    def iter_all_transactions(self, users: List[User]) -> Iterator[Transaction]:
+        return chain.from_iterable(user.get_transactions() for user in users)
+
+    def iter_all_requests(self, users: List[User]) -> Iterator[Translation]:
+        return chain.from_iterable(user.get_requests() for user in users)
+
     def view_all_transactions(self, users: List[User]) -> List[Transaction]:
-        all_transactions = []
-        for user in users:
-            all_transactions.extend(user.get_transactions())
-        return all_transactions
+        return list(self.iter_all_transactions(users))
 
     def view_all_requests(self, users: List[User]) -> List[Translation]:
-        all_requests = []
-        for user in users:
-            all_requests.extend(user.get_requests())
-        return all_requests
+        return list(self.iter_all_requests(users))
 
 
 @dataclass
@@ -11,12 +11,117 @@ class Settings(BaseSettings):
     DB_USER: Optional[str] = None
     DB_PASS: Optional[str] = None
     DB_NAME: Optional[str] = None
+    DB_URL: Optional[str] = None  # полный URL вместо DB_* (например sqlite+aiosqlite для нагрузочных тестов)
+
+    # Connection pool settings
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30
+    DB_POOL_PRE_PING: bool = True
+    DB_POOL_RECYCLE: int = 1800
+    DB_STATEMENT_CACHE_SIZE: int = 100  # 0 при работе через pgbouncer в transaction mode
+    DB_REPLICA_URL: Optional[str] = None  # read-only пути (история, баланс, экспорты)
     
     # Application settings
     APP_NAME: Optional[str] = None
     DEBUG: Optional[bool] = None
     API_VERSION: Optional[str] = None
-    
+
+    # Model settings
+    MODEL_CACHE_MAX_MB: int = 2048
+    MODEL_BACKEND: str = "torch"  # torch, int8, onnx, fake
+    MODEL_BACKENDS: str = ""  # переопределения по парам: "en-fr:int8,fr-en:onnx"
+    FAKE_BACKEND_LATENCY_MS: float = 50  # fake: задержка на вызов
+    FAKE_BACKEND_LATENCY_PER_TEXT_MS: float = 5  # fake: плюс задержка на каждый текст в батче
+    PRELOAD_MODEL_PAIRS: str = "en-fr,fr-en"  # загружаются и прогреваются при старте
+    WARMUP_TEXT: str = "Hello, world. This is a warmup request."
+
+    # Multi-process serving settings (gunicorn.conf.py)
+    WEB_WORKERS: int = 2
+    TORCH_THREADS_PER_WORKER: int = 0  # 0: ядра делятся поровну между воркерами
+    WORKER_CPU_AFFINITY: bool = False
+
+    # Inference batching settings
+    BATCH_MAX_SIZE: int = 16
+    BATCH_MAX_WAIT_MS: int = 10
+    BATCH_MAX_TOKENS: int = 4096
+
+    # Inference executor settings
+    INFERENCE_EXECUTOR: str = "thread"  # "thread" или "process"
+    INFERENCE_WORKERS: int = 2
+
+    # Job queue settings (без BROKER_URL используется брокер в памяти процесса)
+    BROKER_URL: Optional[str] = None
+    JOBS_QUEUE_NAME: str = "translation_jobs"
+    JOBS_CONCURRENCY: int = 4
+    JOBS_LEASE_SECONDS: int = 600  # задача в running дольше этого считается брошенной воркером
+
+    # Translation result cache settings
+    RESULT_CACHE_MAX_ENTRIES: int = 10000
+    RESULT_CACHE_TTL_SECONDS: int = 3600
+    RESULT_CACHE_PERSISTENT: bool = False
+
+    # Fuzzy translation memory settings
+    TM_ENABLED: bool = False
+    TM_THRESHOLD: float = 0.85  # минимальный коэффициент Жаккара по 3-граммам
+    TM_MAX_ENTRIES: int = 50000
+    TM_NUM_PERM: int = 64
+    TM_BANDS: int = 16
+
+    # Rate limiting and fair queuing settings
+    RATE_LIMIT_ENABLED: bool = False
+    RATE_LIMIT_TIERS: str = "free:30:10:1,pro:300:50:4"  # тариф:запросов в минуту:burst:вес в очереди
+    DEFAULT_TIER: str = "free"
+    RATE_LIMIT_MAX_USERS: int = 100000
+    FAIR_QUEUE_MAX_ITEMS: int = 512  # сегментов в очереди пары до ответа 503
+
+    # Idempotency-Key settings
+    IDEMPOTENCY_TTL_SECONDS: int = 86400
+    IDEMPOTENCY_MAX_ENTRIES: int = 10000
+    IDEMPOTENCY_PERSISTENT: bool = False  # таблица idempotency_keys, общая для воркеров
+    IDEMPOTENCY_WAIT_SECONDS: float = 30  # сколько повтор ждёт выполняющийся запрос
+    IDEMPOTENCY_LEASE_SECONDS: float = 300  # после этого незавершённая заявка считается брошенной
+
+    # Segmentation settings
+    SEGMENT_MAX_CHARS: int = 1000
+
+    # Bulk translation API settings
+    BATCH_API_MAX_ITEMS: int = 100
+
+    # Write-behind ledger settings (история переводов и транзакций)
+    LEDGER_WRITE_BEHIND: bool = False
+    LEDGER_FLUSH_INTERVAL_MS: int = 200  # максимальное окно потери при аварии
+    LEDGER_FLUSH_ROWS: int = 500
+    LEDGER_MAX_ROWS: int = 10000  # при заполнении запись ждёт сброса буфера
+
+    # History partitioning and archive settings (только PostgreSQL)
+    PARTITION_MONTHS_AHEAD: int = 2
+    PARTITION_MAINTENANCE_SECONDS: int = 86400
+    ARCHIVE_ENABLED: bool = False  # выгрузку выполняет worker.py или python -m services.archive
+    ARCHIVE_AFTER_MONTHS: int = 12
+    ARCHIVE_DIR: str = "/var/lib/ml_archive"
+    ARCHIVE_SHARDS: int = 64
+    ARCHIVE_BATCH_ROWS: int = 5000
+
+    # Auth settings
+    BCRYPT_ROUNDS: int = 12
+    AUTH_HASH_WORKERS: int = 2
+    SESSION_SECRET: Optional[str] = None
+    SESSION_TTL_SECONDS: int = 86400
+    ALLOW_USER_ID_HEADER: bool = True  # старый способ: X-User-Id без подписи
+
+    # User/wallet hot-row cache settings
+    USER_CACHE_TTL_SECONDS: int = 30
+    USER_CACHE_MAX_ENTRIES: int = 50000
+    USER_CACHE_NOTIFY: bool = False  # инвалидация между воркерами через LISTEN/NOTIFY
+
+    # Profiling settings
+    PROFILE_SAMPLE_RATE: float = 0.0  # доля профилируемых запросов; заголовок X-Profile работает всегда (для админов)
+    PROFILE_PATH_PREFIX: str = "/translate"
+    PROFILE_MIN_DURATION_MS: float = 1000  # выборочные профили быстрее порога не сохраняются
+    PROFILE_DIR: str = "/tmp/ml_profiles"
+    PROFILE_MAX_FILES: int = 200
+
     @property
     def DATABASE_URL_asyncpg(self):
         return f'postgresql+asyncpg://{self.DB_USER}:{self.DB_PASS}@{self.DB_HOST}:{self.DB_PORT}/{self.DB_NAME}'
@@ -33,6 +138,8 @@ class Settings(BaseSettings):
     
     def validate(self) -> None:
         """Validate critical configuration settings"""
+        if self.DB_URL:
+            return
         if not all([self.DB_HOST, self.DB_USER, self.DB_PASS, self.DB_NAME]):
             raise ValueError("Missing required database configuration")
 
@@ -1,15 +1,77 @@
 
+import time
+
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.orm import declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from database.config import get_settings
+from services.metrics import instrument_engine
 
 settings = get_settings()
 
-DATABASE_URL = settings.DATABASE_URL_asyncpg
+DATABASE_URL = settings.DB_URL or settings.DATABASE_URL_asyncpg
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """Пул, который считает время ожидания свободного соединения."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            waited = time.perf_counter() - started
+            self.checkouts += 1
+            self.wait_seconds_total += waited
+            self.wait_seconds_max = max(self.wait_seconds_max, waited)
+
+    def recreate(self):
+        # dispose() пересоздаёт пул: сохраняем класс и счётчики
+        pool = super().recreate()
+        pool.checkouts = self.checkouts
+        pool.wait_seconds_total = self.wait_seconds_total
+        pool.wait_seconds_max = self.wait_seconds_max
+        return pool
 
-engine = create_async_engine(DATABASE_URL, echo=settings.DEBUG)
+
+def _create_engine(url: str):
+    connect_args = {}
+    if url.startswith("postgresql+asyncpg"):
+        connect_args = {
+            "statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+            "prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+        }
+    elif url.startswith("sqlite"):
+        # конкурентные запросы ждут блокировку записи, а не падают с "database is locked"
+        connect_args = {"timeout": settings.DB_POOL_TIMEOUT}
+    return create_async_engine(
+        url,
+        echo=settings.DEBUG,
+        poolclass=InstrumentedQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        connect_args=connect_args,
+    )
+
+
+engine = _create_engine(DATABASE_URL)
+# без реплики read-only сессии идут в основную БД
+read_engine = _create_engine(settings.DB_REPLICA_URL) if settings.DB_REPLICA_URL else engine
+instrument_engine(engine)
+if read_engine is not engine:
+    instrument_engine(read_engine)
 
 async_session = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+read_session = async_sessionmaker(read_engine, class_=AsyncSession, expire_on_commit=False)
 
 Base = declarative_base()
 
@@ -17,4 +79,26 @@ async def get_db():
     async with async_session() as session:
         yield session
 
+async def get_read_db():
+    async with read_session() as session:
+        yield session
+
 
+def pool_stats() -> dict:
+    engines = {"primary": engine}
+    if read_engine is not engine:
+        engines["replica"] = read_engine
+    stats = {}
+    for name, eng in engines.items():
+        pool = eng.sync_engine.pool
+        capacity = pool.size() + settings.DB_MAX_OVERFLOW
+        stats[name] = {
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "overflow": pool.overflow(),
+            "utilisation": round(pool.checkedout() / capacity, 3) if capacity else 0.0,
+            "checkouts": pool.checkouts,
+            "avg_wait_seconds": round(pool.wait_seconds_total / pool.checkouts, 5) if pool.checkouts else 0.0,
+            "max_wait_seconds": round(pool.wait_seconds_max, 5),
+        }
+    return stats
@@ -1,6 +1,65 @@
-from fastapi import Header, HTTPException
+import math
+from fastapi import Depends, Header, HTTPException, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from database.config import get_settings
+from database.database import get_db, read_session
+from services.rate_limit import bind_scheduling, get_rate_limiter, tier_limits
+from services.user_cache import get_user_cache
+from utils.tokens import SessionToken
 
-async def require_user_id(x_user_id: str | None = Header(default=None, alias="X-User-Id")) -> str:
-    if not x_user_id:
-        raise HTTPException(status_code=401, detail="X-User-Id header is required")
-    return x_user_id
\ No newline at end of file
+def _bearer_user_id(authorization: str) -> str:
+    # Bearer-токен проверяется по подписи в памяти, без запроса к БД
+    scheme, _, token = authorization.partition(" ")
+    user_id = SessionToken.verify(token) if scheme.lower() == "bearer" else None
+    if not user_id:
+        raise HTTPException(status_code=401, detail="Invalid or expired session token")
+    return user_id
+
+async def require_user_id(
+    authorization: str | None = Header(default=None),
+    x_user_id: str | None = Header(default=None, alias="X-User-Id"),
+) -> str:
+    if authorization:
+        return _bearer_user_id(authorization)
+    if not x_user_id or not get_settings().ALLOW_USER_ID_HEADER:
+        raise HTTPException(status_code=401, detail="Authorization header is required")
+    return x_user_id
+
+async def require_admin(
+    authorization: str | None = Header(default=None), db: AsyncSession = Depends(get_db)
+) -> str:
+    # только подписанный Bearer-токен: X-User-Id подделывается любым клиентом
+    if not authorization:
+        raise HTTPException(status_code=401, detail="Authorization header is required")
+    user_id = _bearer_user_id(authorization)
+    cached = await get_user_cache().get(db, user_id)
+    if not cached or not cached.is_admin:
+        raise HTTPException(status_code=403, detail="Доступ только для администратора")
+    return user_id
+
+async def enforce_rate_limit(user_id: str, response: Response, cost: int = 1) -> None:
+    """
+    Token bucket по тарифу пользователя (админы без лимита) и привязка запроса
+    к его потоку в справедливой очереди инференса. Тариф читается в отдельной
+    короткой сессии: соединение не должно оставаться занятым на время инференса.
+    Без RATE_LIMIT_ENABLED все пользователи в очереди с весом тарифа по умолчанию.
+    """
+    if not get_settings().RATE_LIMIT_ENABLED:
+        bind_scheduling(user_id, None)
+        return
+    async with read_session() as db:
+        cached = await get_user_cache().get(db, user_id)
+    tier = cached.tier if cached else None
+    bind_scheduling(user_id, tier)
+    if cached and cached.is_admin:
+        return
+    limits = tier_limits(tier)
+    if cost > limits.burst:
+        # такой запрос не поместится в бакет никогда, повтор не поможет
+        raise HTTPException(status_code=400, detail=f"Не больше {limits.burst} элементов в запросе для вашего тарифа")
+    decision = get_rate_limiter().check(user_id, limits, cost)
+    headers = {"X-RateLimit-Limit": str(decision.limit), "X-RateLimit-Remaining": str(decision.remaining)}
+    if not decision.allowed:
+        headers["Retry-After"] = str(math.ceil(decision.retry_after))
+        raise HTTPException(status_code=429, detail="Слишком много запросов, повторите позже", headers=headers)
+    response.headers.update(headers)
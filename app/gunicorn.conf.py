@@ -0,0 +1,73 @@
+# gunicorn.conf.py: многопроцессный режим (gunicorn -c gunicorn.conf.py main:app)
+#
+# Модели загружаются в мастер-процессе до fork, поэтому веса лежат в общих
+# copy-on-write страницах и не дублируются в каждом воркере. После fork
+# каждому воркеру выставляется своё число потоков torch и (опционально)
+# привязка к ядрам, чтобы воркеры не конкурировали за одни и те же ядра.
+import gc
+import logging
+import os
+
+from database.config import get_settings
+
+settings = get_settings()
+
+bind = "0.0.0.0:8080"
+workers = settings.WEB_WORKERS
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+timeout = 300
+
+logger = logging.getLogger("gunicorn.error")
+
+if workers > 1 and not settings.SESSION_SECRET:
+    # без общего секрета каждый воркер подписывал бы токены своим случайным ключом,
+    # и токен, выданный одним воркером, отклонялся бы остальными
+    raise RuntimeError("SESSION_SECRET must be set when WEB_WORKERS > 1")
+
+
+def _available_cpus():
+    return sorted(os.sched_getaffinity(0))
+
+
+def on_starting(server):
+    from services.model_registry import get_model_registry
+    from services.warmup import parse_pairs
+
+    # только загрузка весов, без инференса: пул потоков torch не должен
+    # стартовать в мастере до fork
+    registry = get_model_registry()
+    for pair in parse_pairs(settings.PRELOAD_MODEL_PAIRS):
+        registry.get(pair)
+    logger.info("Preloaded models in master: %s", registry.stats()["loaded"])
+
+
+def when_ready(server):
+    # объекты мастера уходят в постоянное поколение: сборщик мусора воркеров
+    # не будет их трогать и копировать общие страницы
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    import torch
+
+    cpus = _available_cpus()
+    threads = settings.TORCH_THREADS_PER_WORKER or max(1, len(cpus) // workers)
+    torch.set_num_threads(threads)
+
+    if settings.WORKER_CPU_AFFINITY:
+        slot = worker.age % workers
+        start = (slot * threads) % len(cpus)
+        cores = {cpus[(start + i) % len(cpus)] for i in range(threads)}
+        os.sched_setaffinity(0, cores)
+        logger.info("Worker %s: %s torch threads on cores %s", worker.pid, threads, sorted(cores))
+    else:
+        logger.info("Worker %s: %s torch threads", worker.pid, threads)
+
+
+def child_exit(server, worker):
+    # с PROMETHEUS_MULTIPROC_DIR файлы метрик умершего воркера не должны попадать в livesum
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
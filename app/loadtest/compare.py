@@ -0,0 +1,35 @@
+"""
+Сравнение двух прогонов loadtest.run:
+    python -m loadtest.compare loadtest/results/before.json loadtest/results/after.json
+"""
+import json
+import sys
+
+
+def _load(path: str) -> dict:
+    with open(path, encoding="utf-8") as f:
+        report = json.load(f)
+    return {(r["endpoint"], r["concurrency"]): r for r in report["results"]}
+
+
+def _delta(before: float, after: float) -> str:
+    if not before:
+        return "n/a"
+    return f"{(after - before) / before * 100:+.1f}%"
+
+
+def compare(before_path: str, after_path: str) -> None:
+    before, after = _load(before_path), _load(after_path)
+    print(f"{'endpoint':<28} {'c':>4} {'rps':>18} {'p95 ms':>22} {'p99 ms':>22}")
+    for key in sorted(before.keys() & after.keys()):
+        a, b = before[key], after[key]
+        print(
+            f"{key[0]:<28} {key[1]:>4} "
+            f"{a['throughput_rps']:>7.1f}→{b['throughput_rps']:<7.1f}{_delta(a['throughput_rps'], b['throughput_rps']):>3} "
+            f"{a['p95_ms']:>7.1f}→{b['p95_ms']:<7.1f}{_delta(a['p95_ms'], b['p95_ms']):>6} "
+            f"{a['p99_ms']:>7.1f}→{b['p99_ms']:<7.1f}{_delta(a['p99_ms'], b['p99_ms']):>6}"
+        )
+
+
+if __name__ == "__main__":
+    compare(sys.argv[1], sys.argv[2])
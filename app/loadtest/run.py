@@ -0,0 +1,201 @@
+"""
+Нагрузочный прогон приложения в процессе (httpx + ASGI, без сети):
+    cd app
+    pip install -r loadtest/requirements.txt
+    python -m loadtest.run --concurrency 1,8,32 --requests 200 --latency-ms 50
+
+По умолчанию БД — временный SQLite-файл, перевод — fake-бэкенд с заданной задержкой.
+DB_URL из окружения позволяет прогнать тот же сценарий на Postgres.
+Результаты сохраняются в JSON; два прогона сравнивает python -m loadtest.compare.
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, List
+
+PASSWORD = "loadtest-password"
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", default="1,8,32", help="уровни параллельности через запятую")
+    parser.add_argument("--requests", type=int, default=200, help="запросов на эндпоинт и уровень")
+    parser.add_argument("--latency-ms", type=float, default=50, help="задержка fake-бэкенда на вызов")
+    parser.add_argument("--latency-per-text-ms", type=float, default=5, help="задержка fake-бэкенда на текст")
+    parser.add_argument("--endpoints", default="", help="подмножество сценариев через запятую")
+    parser.add_argument("--out", default=None, help="путь к JSON с результатами")
+    return parser.parse_args(argv)
+
+
+def configure_env(args: argparse.Namespace, workdir: str) -> None:
+    # до импорта приложения: настройки и движок БД создаются при импорте
+    os.environ.setdefault("DB_URL", f"sqlite+aiosqlite:///{os.path.join(workdir, 'loadtest.db')}")
+    os.environ.setdefault("SESSION_SECRET", "loadtest")
+    os.environ["MODEL_BACKEND"] = "fake"
+    os.environ["MODEL_BACKENDS"] = ""
+    os.environ["PRELOAD_MODEL_PAIRS"] = ""
+    os.environ["FAKE_BACKEND_LATENCY_MS"] = str(args.latency_ms)
+    os.environ["FAKE_BACKEND_LATENCY_PER_TEXT_MS"] = str(args.latency_per_text_ms)
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    # nearest-rank
+    rank = max(1, math.ceil(q / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize(endpoint: str, concurrency: int, latencies: List[float], errors: int, elapsed: float) -> dict:
+    values = sorted(latencies)
+    ms = lambda seconds: round(seconds * 1000, 2)
+    return {
+        "endpoint": endpoint,
+        "concurrency": concurrency,
+        "requests": len(values),
+        "errors": errors,
+        "elapsed_seconds": round(elapsed, 3),
+        "throughput_rps": round(len(values) / elapsed, 2) if elapsed else 0.0,
+        "mean_ms": ms(sum(values) / len(values)) if values else 0.0,
+        "p50_ms": ms(percentile(values, 50)),
+        "p95_ms": ms(percentile(values, 95)),
+        "p99_ms": ms(percentile(values, 99)),
+        "max_ms": ms(values[-1]) if values else 0.0,
+    }
+
+
+def scenarios(users: List[dict]) -> Dict[str, Callable[..., Awaitable]]:
+    """Запрос i-го шага: пользователи перебираются по кругу, тексты уникальны (промахи кэша)."""
+
+    def auth(i: int) -> dict:
+        return {"Authorization": f"Bearer {users[i % len(users)]['token']}"}
+
+    return {
+        "POST /translate": lambda client, i: client.post("/translate/", headers=auth(i), json={
+            "input_text": f"Load test sentence number {i} at {time.time_ns()}.",
+            "source_lang": "en",
+            "target_lang": "fr",
+        }),
+        "GET /wallet": lambda client, i: client.get("/wallet/", headers=auth(i)),
+        "GET /history/translations": lambda client, i: client.get(
+            "/history/translations", headers=auth(i), params={"limit": 50}
+        ),
+        "GET /history/transactions": lambda client, i: client.get(
+            "/history/transactions", headers=auth(i), params={"limit": 50}
+        ),
+        "POST /auth/signin": lambda client, i: client.post("/auth/signin", json={
+            "email": users[i % len(users)]["email"],
+            "password": PASSWORD,
+        }),
+    }
+
+
+async def run_level(client, request: Callable[..., Awaitable], concurrency: int, total: int) -> tuple:
+    latencies: List[float] = []
+    errors = 0
+    counter = iter(range(total))
+
+    async def worker():
+        nonlocal errors
+        for i in counter:
+            started = time.perf_counter()
+            try:
+                response = await request(client, i)
+                failed = response.status_code >= 400
+            except Exception:
+                failed = True
+            latencies.append(time.perf_counter() - started)
+            errors += failed
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, errors, time.perf_counter() - started
+
+
+async def create_users(client, count: int, balance: int) -> List[dict]:
+    users = []
+    for i in range(count):
+        email = f"loadtest-{i}-{os.getpid()}@example.com"
+        response = await client.post("/auth/signup", json={"email": email, "password": PASSWORD})
+        response.raise_for_status()
+        token = response.json()["token"]
+        topup = await client.post("/wallet/topup", headers={"Authorization": f"Bearer {token}"}, json={"amount": balance})
+        topup.raise_for_status()
+        users.append({"email": email, "token": token})
+    return users
+
+
+def _git_revision() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except Exception:
+        return "unknown"
+
+
+async def main(args: argparse.Namespace) -> dict:
+    import httpx
+
+    from database.database import engine
+    from main import app
+
+    levels = [int(level) for level in args.concurrency.split(",")]
+    await app.router.startup()
+    try:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://loadtest") as client:
+            users = await create_users(client, max(levels), balance=args.requests * len(levels) + 100)
+            plan = scenarios(users)
+            selected = [name for name in plan if not args.endpoints or name in args.endpoints.split(",")]
+
+            results = []
+            # /translate первым: он же наполняет историю для /history/*
+            for name in selected:
+                for concurrency in levels:
+                    latencies, errors, elapsed = await run_level(client, plan[name], concurrency, args.requests)
+                    result = summarize(name, concurrency, latencies, errors, elapsed)
+                    results.append(result)
+                    print(
+                        f"{name:<28} c={concurrency:<4} {result['throughput_rps']:>9.1f} rps  "
+                        f"p50 {result['p50_ms']:>8.1f}  p95 {result['p95_ms']:>8.1f}  "
+                        f"p99 {result['p99_ms']:>8.1f} ms  errors {errors}",
+                        file=sys.stderr,
+                    )
+    finally:
+        await app.router.shutdown()
+        await engine.dispose()
+
+    return {
+        "meta": {
+            "started_at": datetime.utcnow().isoformat(),
+            "git_revision": _git_revision(),
+            "python": platform.python_version(),
+            "database": os.environ["DB_URL"].split(":", 1)[0],
+            "requests_per_level": args.requests,
+            "concurrency": levels,
+            "fake_latency_ms": args.latency_ms,
+            "fake_latency_per_text_ms": args.latency_per_text_ms,
+        },
+        "results": results,
+    }
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    with tempfile.TemporaryDirectory() as workdir:
+        configure_env(args, workdir)
+        report = asyncio.run(main(args))
+
+    out = args.out or os.path.join(
+        os.path.dirname(__file__), "results", f"{datetime.utcnow():%Y%m%dT%H%M%S}-{report['meta']['git_revision']}.json"
+    )
+    os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(out)
@@ -1,20 +1,62 @@
+import asyncio
+
 from fastapi import FastAPI
 from routers.home import router as home_router
 from routers.auth import router as auth_router
 from routers.translate import router as translate_router
 from routers.wallet import router as wallet_router
 from routers.history import router as history_router
+from routers.admin import router as admin_router
+from database.config import get_settings
 from database.database import engine, Base
+from services.archive import maintenance_loop
+from services.broker import get_broker
+from services.inference_executor import shutdown_inference_executor
+from services.ledger import get_ledger
+from services.metrics import MetricsMiddleware
+from services.partitions import ensure_partitions
+from services.profiling import ProfilingMiddleware
+from services.translation_jobs import start_inprocess_consumer
+from services.translation_memory import start_translation_memory
+from services.user_cache import start_user_cache_listener
+from services.warmup import start_warmup
 
 app = FastAPI()
+app.add_middleware(ProfilingMiddleware)
+app.add_middleware(MetricsMiddleware)
 
 @app.on_event("startup")
 async def on_startup():
+    app.state.warmup = start_warmup()
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        await ensure_partitions(conn, get_settings().PARTITION_MONTHS_AHEAD)
+    app.state.jobs_consumer = start_inprocess_consumer(get_settings().JOBS_CONCURRENCY)
+    if get_ledger() is not None:
+        get_ledger().start()
+    app.state.user_cache_listener = start_user_cache_listener()
+    app.state.translation_memory = start_translation_memory()
+    # архивирует только worker.py, API лишь заводит партиции на будущие месяцы
+    app.state.partitions = asyncio.create_task(maintenance_loop(archive=False))
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    app.state.warmup.cancel()
+    if app.state.jobs_consumer is not None:
+        app.state.jobs_consumer.cancel()
+    if app.state.user_cache_listener is not None:
+        app.state.user_cache_listener.cancel()
+    if app.state.translation_memory is not None:
+        app.state.translation_memory.cancel()
+    app.state.partitions.cancel()
+    await get_broker().close()
+    shutdown_inference_executor()
+    if get_ledger() is not None:
+        await get_ledger().close()
 
 app.include_router(home_router)
 app.include_router(auth_router)
 app.include_router(translate_router)
 app.include_router(wallet_router)
 app.include_router(history_router)
+app.include_router(admin_router)
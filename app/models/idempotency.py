@@ -0,0 +1,24 @@
+from typing import Optional
+from sqlalchemy import String, DateTime, Integer, Text, Index
+from sqlalchemy.orm import Mapped, mapped_column
+from datetime import datetime
+
+from database.database import Base
+
+
+class IdempotencyKey(Base):
+    """Сохранённый ответ на запрос с Idempotency-Key; status_code NULL — запрос ещё выполняется."""
+
+    __tablename__ = "idempotency_keys"
+
+    # sha256 от (user_id, маршрут, значение заголовка)
+    key: Mapped[str] = mapped_column(String(64), primary_key=True)
+    fingerprint: Mapped[str] = mapped_column(String(64), nullable=False)
+    status_code: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    media_type: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    body: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    expires_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+
+
+Index("ix_idempotency_keys_expires_at", IdempotencyKey.expires_at)
@@ -0,0 +1,27 @@
+from typing import Optional
+from sqlalchemy import Integer, String, DateTime, ForeignKey
+from sqlalchemy.orm import Mapped, mapped_column
+from datetime import datetime
+import uuid
+
+from database.database import Base
+
+
+class TranslationJob(Base):
+    __tablename__ = "translation_jobs"
+
+    id: Mapped[str] = mapped_column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    user_id: Mapped[str] = mapped_column(ForeignKey("users.id"), nullable=False, index=True)
+    status: Mapped[str] = mapped_column(String, default="queued")  # queued, running, done, failed
+
+    input_text: Mapped[str] = mapped_column(String, nullable=False)
+    source_lang: Mapped[str] = mapped_column(String, nullable=False)
+    target_lang: Mapped[str] = mapped_column(String, nullable=False)
+    output_text: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    error: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    # резерв, зафиксированный под задачу и ещё не списанный и не возвращённый
+    reserved: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    claimed_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)  # начало аренды воркером
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
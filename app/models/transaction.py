@@ -1,20 +1,27 @@
 
-from sqlalchemy import String, DateTime, Integer, ForeignKey
+from sqlalchemy import String, DateTime, Integer, ForeignKey, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from database.database import Base
+from utils.clock import UtcClock
 from datetime import datetime
 import uuid
 
 class Transaction(Base):
     __tablename__ = "transactions"
+    # помесячные партиции создаёт services.partitions.ensure_partitions
+    __table_args__ = {"postgresql_partition_by": "RANGE (timestamp)"}
 
+    # ключ партиционирования обязан входить в первичный ключ
     id: Mapped[str] = mapped_column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
-    timestamp: Mapped[datetime] = mapped_column(DateTime, default=datetime.now)
-    user_id: Mapped[str] = mapped_column(ForeignKey("users.id"), nullable=False, index=True)
+    timestamp: Mapped[datetime] = mapped_column(DateTime, primary_key=True, default=UtcClock.now)
+    user_id: Mapped[str] = mapped_column(ForeignKey("users.id"), nullable=False)
     amount: Mapped[int] = mapped_column(Integer, nullable=False)
     type: Mapped[str] = mapped_column(String, default="Списание")
 
     user = relationship("User", back_populates="transactions")
 
     def __str__(self):
-        return f"{self.timestamp}: {self.type} {self.amount} by {self.user_id}"
\ No newline at end of file
+        return f"{self.timestamp}: {self.type} {self.amount} by {self.user_id}"
+
+
+Index("ix_transactions_user_ts_id", Transaction.user_id, Transaction.timestamp.desc(), Transaction.id.desc())
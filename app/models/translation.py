@@ -1,23 +1,37 @@
-from sqlalchemy import Column, String, Integer, DateTime, ForeignKey
+from typing import Optional
+from sqlalchemy import Column, String, Integer, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship, Mapped, mapped_column
 from datetime import datetime
 import uuid
 
 from database.database import Base
+from utils.clock import UtcClock
 
 
 class Translation(Base):
     __tablename__ = "translations"
+    __table_args__ = (
+        Index("ix_translations_lang_input_hash", "source_lang", "target_lang", "input_hash"),
+        # помесячные партиции создаёт services.partitions.ensure_partitions
+        {"postgresql_partition_by": "RANGE (timestamp)"},
+    )
 
+    # ключ партиционирования обязан входить в первичный ключ
     id: Mapped[str] = mapped_column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
-    timestamp: Mapped[datetime] = mapped_column(DateTime, default=datetime.now)
-    user_id: Mapped[str] = mapped_column(ForeignKey("users.id"), nullable=False, index=True)
+    timestamp: Mapped[datetime] = mapped_column(DateTime, primary_key=True, default=UtcClock.now)
+    user_id: Mapped[str] = mapped_column(ForeignKey("users.id"), nullable=False)
 
     input_text: Mapped[str] = mapped_column(String, nullable=False)
     output_text: Mapped[str] = mapped_column(String, nullable=False)
+    # sha256 нормализованного input_text, ключ постоянного кэша переводов
+    input_hash: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
 
     source_lang: Mapped[str] = mapped_column(String, nullable=False)
     target_lang: Mapped[str] = mapped_column(String, nullable=False)
     cost: Mapped[int] = mapped_column(Integer, default=1)
 
     user: Mapped["User"] = relationship("User", back_populates="translations")
+
+
+# история пользователя: фильтр по user_id и keyset-пагинация по (timestamp, id)
+Index("ix_translations_user_ts_id", Translation.user_id, Translation.timestamp.desc(), Translation.id.desc())
@@ -13,6 +13,7 @@ class User(Base):
     email: Mapped[str] = mapped_column(String, unique=True, index=True, nullable=False)
     _password_hash: Mapped[str] = mapped_column("password_hash", String, nullable=False)
     is_admin: Mapped[bool] = mapped_column(Boolean, default=False)
+    tier: Mapped[str] = mapped_column(String, default="free", server_default="free")
 
     # Связи
     wallet: Mapped["Wallet"] = relationship(
@@ -38,5 +39,22 @@ class User(Base):
             wallet=Wallet(balance=initial_balance)
         )
 
+    @classmethod
+    async def create_instance_async(cls, id: str, email: str, password: str, is_admin: bool = False, initial_balance: int = 0):
+        """То же, что create_instance, но bcrypt считается вне event loop."""
+        UserValidator.validate_email(email)
+        UserValidator.validate_password(password)
+
+        return cls(
+            id=id,
+            email=email,
+            _password_hash=await PasswordHasher.hash_async(password),
+            is_admin=is_admin,
+            wallet=Wallet(balance=initial_balance)
+        )
+
     def check_password(self, password: str) -> bool:
         return PasswordHasher.check(password, self._password_hash)
+
+    async def check_password_async(self, password: str) -> bool:
+        return await PasswordHasher.check_async(password, self._password_hash)
@@ -0,0 +1,92 @@
+import csv
+import io
+import json
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import FileResponse, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database.database import get_read_db, read_session
+from deps import require_admin
+from services.admin_actions import AdminActions
+from services.profiling import get_profile_store
+
+router = APIRouter(prefix="/admin", tags=["Admin"], dependencies=[Depends(require_admin)])
+
+ExportFormat = Literal["ndjson", "csv"]
+
+
+def _export_response(stream, columns, fmt: ExportFormat, user_id: Optional[str], name: str) -> StreamingResponse:
+    async def rows() -> AsyncIterator[str]:
+        # своя сессия: генератор живёт дольше зависимости get_read_db
+        async with read_session() as db:
+            if fmt == "csv":
+                buffer = io.StringIO()
+                writer = csv.writer(buffer)
+                writer.writerow([c.key for c in columns])
+            async for row in stream(db, user_id):
+                if fmt == "ndjson":
+                    yield json.dumps(row, default=str, ensure_ascii=False) + "\n"
+                else:
+                    writer.writerow(row.values())
+                    yield buffer.getvalue()
+                    buffer.seek(0)
+                    buffer.truncate()
+            if fmt == "csv" and buffer.tell():
+                yield buffer.getvalue()
+
+    media_type = "application/x-ndjson" if fmt == "ndjson" else "text/csv"
+    return StreamingResponse(
+        rows(),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{name}.{fmt}"'},
+    )
+
+@router.get("/export/transactions")
+async def export_transactions(format: ExportFormat = "ndjson", user_id: Optional[str] = None):
+    return _export_response(
+        AdminActions.stream_transactions, AdminActions.TRANSACTION_EXPORT_COLUMNS, format, user_id, "transactions"
+    )
+
+@router.get("/export/translations")
+async def export_translations(format: ExportFormat = "ndjson", user_id: Optional[str] = None):
+    return _export_response(
+        AdminActions.stream_translations, AdminActions.TRANSLATION_EXPORT_COLUMNS, format, user_id, "translations"
+    )
+
+@router.get("/reports/spend-by-user", response_model=List[Dict[str, Any]])
+async def spend_by_user(
+    since: Optional[datetime] = Query(default=None),
+    until: Optional[datetime] = Query(default=None),
+    db: AsyncSession = Depends(get_read_db),
+):
+    return await AdminActions.spend_by_user(db, since, until)
+
+@router.get("/reports/daily-volume", response_model=List[Dict[str, Any]])
+async def daily_volume(
+    since: Optional[datetime] = Query(default=None),
+    until: Optional[datetime] = Query(default=None),
+    db: AsyncSession = Depends(get_read_db),
+):
+    return await AdminActions.daily_volume(db, since, until)
+
+@router.get("/reports/language-pairs", response_model=List[Dict[str, Any]])
+async def language_pairs(
+    since: Optional[datetime] = Query(default=None),
+    until: Optional[datetime] = Query(default=None),
+    db: AsyncSession = Depends(get_read_db),
+):
+    return await AdminActions.language_pair_counts(db, since, until)
+
+@router.get("/profiles", response_model=List[Dict[str, Any]])
+async def list_profiles():
+    return get_profile_store().list()
+
+@router.get("/profiles/{profile_id}")
+async def download_profile(profile_id: str):
+    path = get_profile_store().html_path(profile_id)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Профиль не найден")
+    return FileResponse(path, media_type="text/html", filename=f"{profile_id}.html")
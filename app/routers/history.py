@@ -1,34 +1,95 @@
-from typing import List, Optional
+import asyncio
+from typing import Callable, List, Literal, Optional, Union
 from pydantic import BaseModel
 from datetime import datetime
 
-from fastapi import APIRouter, Depends, Header, HTTPException, Query
-from sqlalchemy import select
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
+from sqlalchemy import select, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from database.database import get_db
+from database.database import get_read_db
 from deps import require_user_id
 from models.translation import Translation
 from models.transaction import Transaction
+from services.archive import get_history_archive
+from utils.cursor import KeysetCursor
 
 
 
 router = APIRouter(prefix="/history", tags=["History"])
 
-class TranslationItem(BaseModel):
+
+def _decode_cursor(cursor: Optional[str]):
+    if not cursor:
+        return None
+    try:
+        return KeysetCursor.decode(cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def _after_cursor(stmt, model, before):
+    # keyset: строки строго "после" курсора в порядке (timestamp DESC, id DESC)
+    if before is None:
+        return stmt
+    timestamp, id = before
+    return stmt.where(tuple_(model.timestamp, model.id) < tuple_(timestamp, id))
+
+
+async def _with_archive(
+    rows, table: str, user_id: str, before, limit: int, columns, where: Optional[Callable[[dict], bool]] = None
+) -> list:
+    # старые месяцы выгружены из БД: недостающие строки страницы дочитываются из архива
+    rows = list(rows)
+    if len(rows) >= limit:
+        return rows
+    if rows:
+        before = (rows[-1]["timestamp"], rows[-1]["id"])
+    archived = await asyncio.to_thread(
+        get_history_archive().read_user_rows, table, user_id, before, limit - len(rows), where
+    )
+    return rows + [{column.key: row[column.key] for column in columns} for row in archived]
+
+
+def _set_next_cursor(response: Response, rows, limit: int) -> None:
+    if len(rows) == limit:
+        response.headers["X-Next-Cursor"] = KeysetCursor.encode(rows[-1]["timestamp"], rows[-1]["id"])
+
+
+class TranslationSummaryItem(BaseModel):
     id: str
     timestamp: datetime
-    input_text: str
-    output_text: str
     source_lang: str
     target_lang: str
     cost: int
     class Config: from_attributes = True
 
-@router.get("/translations", response_model=List[TranslationItem])
-async def list_translations(db: AsyncSession = Depends(get_db), user_id: str = Depends(require_user_id)):
-    q = await db.execute(select(Translation).where(Translation.user_id == user_id).order_by(Translation.timestamp.desc()))
-    return q.scalars().all()
+class TranslationItem(TranslationSummaryItem):
+    input_text: str
+    output_text: str
+
+@router.get("/translations", response_model=Union[List[TranslationItem], List[TranslationSummaryItem]])
+async def list_translations(
+    response: Response,
+    db: AsyncSession = Depends(get_read_db),
+    user_id: str = Depends(require_user_id),
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = Query(default=None, description="Значение X-Next-Cursor из предыдущей страницы"),
+    view: Literal["full", "summary"] = Query("full", description="summary: без input_text/output_text"),
+):
+    columns = [Translation.id, Translation.timestamp, Translation.source_lang, Translation.target_lang, Translation.cost]
+    if view == "full":
+        columns += [Translation.input_text, Translation.output_text]
+
+    before = _decode_cursor(cursor)
+    stmt = select(*columns).where(Translation.user_id == user_id)
+    stmt = _after_cursor(stmt, Translation, before)
+    stmt = stmt.order_by(Translation.timestamp.desc(), Translation.id.desc()).limit(limit)
+
+    rows = (await db.execute(stmt)).mappings().all()
+    rows = await _with_archive(rows, Translation.__tablename__, user_id, before, limit, columns)
+    _set_next_cursor(response, rows, limit)
+    return rows
 
 class TransactionItem(BaseModel):
     id: str
@@ -40,16 +101,28 @@ class TransactionItem(BaseModel):
 
 @router.get("/transactions", response_model=List[TransactionItem])
 async def list_transactions(
-    db: AsyncSession = Depends(get_db),
+    response: Response,
+    db: AsyncSession = Depends(get_read_db),
     user_id: str = Depends(require_user_id),
     tx_type: Optional[str] = Query(default=None, description="Фильтр по типу: 'Пополнение' или 'Списание'"),
     limit: int = Query(50, ge=1, le=200),
-    offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(default=None, description="Значение X-Next-Cursor из предыдущей страницы"),
+    offset: int = Query(0, ge=0, description="Устарело: используйте cursor"),
 ):
-    stmt = select(Transaction).where(Transaction.user_id == user_id)
+    columns = [Transaction.id, Transaction.timestamp, Transaction.amount, Transaction.type]
+    before = _decode_cursor(cursor)
+    stmt = select(*columns).where(Transaction.user_id == user_id)
     if tx_type:
         stmt = stmt.where(Transaction.type == tx_type)
-    stmt = stmt.order_by(Transaction.timestamp.desc()).limit(limit).offset(offset)
+    stmt = _after_cursor(stmt, Transaction, before)
+    stmt = stmt.order_by(Transaction.timestamp.desc(), Transaction.id.desc()).limit(limit)
+    if offset and not cursor:
+        stmt = stmt.offset(offset)
 
-    res = await db.execute(stmt)
-    return res.scalars().all()
+    rows = (await db.execute(stmt)).mappings().all()
+    if not offset or cursor:
+        # устаревший offset архив не поддерживает
+        where = (lambda row: row["type"] == tx_type) if tx_type else None
+        rows = await _with_archive(rows, Transaction.__tablename__, user_id, before, limit, columns, where)
+    _set_next_cursor(response, rows, limit)
+    return rows
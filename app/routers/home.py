@@ -1,5 +1,19 @@
-from typing import Dict
+from typing import Any, Dict
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import JSONResponse, Response
+from database.database import pool_stats
+from services.batcher import batcher_stats
+from services.idempotency import get_idempotency_store
+from services.inference_executor import get_inference_executor
+from services.ledger import get_ledger
+from services import metrics
+from services.model_registry import get_model_registry
+from services.rate_limit import get_rate_limiter
+from services.translation_cache import get_translation_cache
+from services.translation_memory import get_translation_memory
+from services.user_cache import get_user_cache
+from services.warmup import Readiness
+from utils.memory import ProcessMemory
 
 router = APIRouter(tags=["Home"])
 
@@ -13,3 +27,29 @@ async def health() -> Dict[str, str]:
         return {"status": "healthy"}
     except Exception:
         raise HTTPException(status_code=503, detail="Service unavailable")
+
+@router.get("/ready", response_model=Dict[str, Any])
+async def ready():
+    # в отличие от /health отвечает 200 только после загрузки и прогрева моделей
+    return JSONResponse(Readiness.as_dict(), status_code=200 if Readiness.is_ready() else 503)
+
+@router.get("/stats", response_model=Dict[str, Any])
+async def stats() -> Dict[str, Any]:
+    return {
+        "models": get_model_registry().stats(),
+        "inference": get_inference_executor().stats(),
+        "fair_queue": batcher_stats(),
+        "rate_limit": get_rate_limiter().stats(),
+        "idempotency": get_idempotency_store().stats(),
+        "cache": get_translation_cache().stats(),
+        "translation_memory": get_translation_memory().stats() if get_translation_memory() is not None else None,
+        "ledger": get_ledger().stats() if get_ledger() is not None else None,
+        "users": get_user_cache().stats(),
+        "db_pool": pool_stats(),
+        "process": ProcessMemory.snapshot(),
+    }
+
+@router.get("/metrics", include_in_schema=False)
+async def prometheus_metrics() -> Response:
+    body, content_type = metrics.render()
+    return Response(body, media_type=content_type)
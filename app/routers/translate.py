@@ -1,12 +1,20 @@
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from database.database import get_db
-from deps import require_user_id
+from deps import enforce_rate_limit, require_user_id
 
+from services.idempotency import idempotent, idempotent_stream
+from services.inference_executor import InferenceOverloaded
+from services.rate_limit import current_scheduling
+from services.translation_jobs import enqueue_job, get_job
+from services.translation_batch import process_batch_request
 from services.translation_request import process_translation_request  # <-- этого теперь хватит
+from services.translation_stream import reserve_for_stream, stream_translation
 
-from pydantic import BaseModel
+from typing import List, Optional
+from pydantic import BaseModel, Field
+from database.config import get_settings
 from datetime import datetime
 
 router = APIRouter(prefix="/translate", tags=["Translate"])
@@ -16,10 +24,119 @@ class TranslationIn(BaseModel):
     source_lang: str
     target_lang: str
 
+def _set_queue_position(response: Response) -> None:
+    # сколько сегментов других пользователей стояло впереди первого сегмента запроса
+    scheduling = current_scheduling()
+    if scheduling is not None and scheduling.queue_position is not None:
+        response.headers["X-Queue-Position"] = str(scheduling.queue_position)
+
 @router.post("/")
 async def translate_endpoint(
     data: TranslationIn,
+    response: Response,
+    db: AsyncSession = Depends(get_db),
+    user_id: str = Depends(require_user_id),
+    idempotency_key: Optional[str] = Header(default=None, alias="Idempotency-Key"),
+):
+    async def handler():
+        # лимит внутри handler: повтор с Idempotency-Key получает сохранённый ответ, не тратя токены
+        await enforce_rate_limit(user_id, response)
+        try:
+            result = await process_translation_request(db, user_id, data)
+            _set_queue_position(response)
+            return result
+        except InferenceOverloaded:
+            raise HTTPException(status_code=503, detail="Сервис перегружен, повторите позже", headers={"Retry-After": "1"})
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    return await idempotent(idempotency_key, user_id, "translate", data, handler)
+
+class BatchIn(BaseModel):
+    items: List[TranslationIn] = Field(..., min_length=1, max_length=get_settings().BATCH_API_MAX_ITEMS)
+
+@router.post("/batch")
+async def translate_batch_endpoint(
+    data: BatchIn,
+    response: Response,
+    db: AsyncSession = Depends(get_db),
+    user_id: str = Depends(require_user_id),
+    idempotency_key: Optional[str] = Header(default=None, alias="Idempotency-Key"),
+):
+    async def handler():
+        await enforce_rate_limit(user_id, response, cost=len(data.items))
+        try:
+            result = await process_batch_request(db, user_id, data.items)
+            _set_queue_position(response)
+            return result
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    return await idempotent(idempotency_key, user_id, "translate/batch", data, handler)
+
+@router.post("/stream")
+async def translate_stream(
+    data: TranslationIn,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db),
+    user_id: str = Depends(require_user_id),
+    idempotency_key: Optional[str] = Header(default=None, alias="Idempotency-Key"),
+):
+    async def start():
+        await enforce_rate_limit(user_id, response)
+        try:
+            await reserve_for_stream(db, user_id, data)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return stream_translation(user_id, data, request.is_disconnected)
+
+    # заголовки лимита ставятся в start(): готовый Response их сам не подхватывает
+    return await idempotent_stream(
+        idempotency_key, user_id, "translate/stream", data, start, headers=response.headers
+    )
+
+
+class JobOut(BaseModel):
+    job_id: str
+    status: str
+    output_text: Optional[str] = None
+    error: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+
+@router.post("/jobs", response_model=JobOut, status_code=202)
+async def create_job(
+    data: TranslationIn,
+    response: Response,
+    db: AsyncSession = Depends(get_db),
+    user_id: str = Depends(require_user_id),
+    idempotency_key: Optional[str] = Header(default=None, alias="Idempotency-Key"),
+):
+    async def handler():
+        await enforce_rate_limit(user_id, response)
+        try:
+            job = await enqueue_job(db, user_id, data)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return JobOut(job_id=job.id, status=job.status, created_at=job.created_at, updated_at=job.updated_at)
+
+    return await idempotent(idempotency_key, user_id, "translate/jobs", data, handler, status_code=202)
+
+@router.get("/jobs/{job_id}", response_model=JobOut)
+async def job_status(
+    job_id: str,
     db: AsyncSession = Depends(get_db),
     user_id: str = Depends(require_user_id),
 ):
-    return await process_translation_request(db, user_id, data)
+    job = await get_job(db, user_id, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Задача не найдена")
+    return JobOut(
+        job_id=job.id,
+        status=job.status,
+        output_text=job.output_text,
+        error=job.error,
+        created_at=job.created_at,
+        updated_at=job.updated_at,
+    )
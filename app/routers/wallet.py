@@ -1,13 +1,12 @@
-from datetime import datetime
-import uuid
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import select
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel, Field
-from database.database import get_db
+from database.database import get_db, get_read_db
 from deps import require_user_id
-from models.wallet import Wallet
-from models.transaction import Transaction
+from services.billing import deposit
+from services.idempotency import idempotent
+from services.user_cache import get_user_cache
 
 router = APIRouter(prefix="/wallet", tags=["Wallet"])
 
@@ -18,16 +17,23 @@ class TopUpIn(BaseModel):
     amount: int = Field(..., gt=0)
 
 @router.get("/", response_model=BalanceOut)
-async def get_balance(db: AsyncSession = Depends(get_db), user_id: str = Depends(require_user_id)):
-    wallet = (await db.execute(select(Wallet).where(Wallet.user_id == user_id))).scalar_one_or_none()
-    if not wallet: raise HTTPException(status_code=404, detail="Счет не найден")
-    return BalanceOut(balance=wallet.balance)
+async def get_balance(db: AsyncSession = Depends(get_read_db), user_id: str = Depends(require_user_id)):
+    cached = await get_user_cache().get(db, user_id)
+    if not cached or cached.balance is None: raise HTTPException(status_code=404, detail="Счет не найден")
+    return BalanceOut(balance=cached.balance)
 
 @router.post("/topup")
-async def topup(data: TopUpIn, db: AsyncSession = Depends(get_db), user_id: str = Depends(require_user_id)):
-    wallet = (await db.execute(select(Wallet).where(Wallet.user_id == user_id))).scalar_one_or_none()
-    if not wallet: raise HTTPException(status_code=404, detail="Счет не найден")
-    wallet.balance += data.amount
-    db.add(Transaction(id=str(uuid.uuid4()), timestamp=datetime.utcnow(), user_id=user_id, amount=data.amount, type="Пополнение"))
-    await db.commit()
-    return {"message": "Баланс пополнен", "Новый баланс": wallet.balance}
+async def topup(
+    data: TopUpIn,
+    db: AsyncSession = Depends(get_db),
+    user_id: str = Depends(require_user_id),
+    idempotency_key: Optional[str] = Header(default=None, alias="Idempotency-Key"),
+):
+    async def handler():
+        try:
+            balance = await deposit(db, user_id, data.amount, "Пополнение")
+        except ValueError as e:
+            raise HTTPException(status_code=404, detail=str(e))
+        return {"message": "Баланс пополнен", "Новый баланс": balance}
+
+    return await idempotent(idempotency_key, user_id, "wallet/topup", data, handler)
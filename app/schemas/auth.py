@@ -1,3 +1,4 @@
+from typing import Optional
 from pydantic import BaseModel, EmailStr
 
 class UserAuth(BaseModel):
@@ -6,4 +7,5 @@ class UserAuth(BaseModel):
 
 class SignResponse(BaseModel):
     message: str
-    user_id: str
\ No newline at end of file
+    user_id: str
+    token: Optional[str] = None
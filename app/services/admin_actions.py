@@ -1,9 +1,11 @@
+from datetime import datetime
+from typing import AsyncIterator, List, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import func, select
 from models.user import User
-from models.wallet import Wallet
 from models.transaction import Transaction
 from models.translation import Translation
+from services.billing import deposit
 
 
 class AdminActions:
@@ -11,34 +13,87 @@ class AdminActions:
     @staticmethod
     async def approve_bonus(
             db: AsyncSession, user_id: str, amount: int, description: str = "Бонус"
-    ):
-        result = await db.execute(select(Wallet).where(Wallet.user_id == user_id))
-        wallet = result.scalar_one_or_none()
-        if not wallet:
-            raise ValueError(f"Wallet not found for user {user_id}")
+    ) -> int:
+        return await deposit(db, user_id, amount, description)
 
-        wallet.balance += amount
+    # Экспорт: колонки вместо ORM-объектов и серверный курсор, чтобы память
+    # не росла ни от результата, ни от identity map сессии
+    EXPORT_YIELD_PER = 1000
 
-        db.add(Transaction(
-            user_id=user_id,
-            amount=amount,
-            type=description
-        ))
-
-        await db.commit()
+    TRANSACTION_EXPORT_COLUMNS = (
+        Transaction.id, Transaction.timestamp, Transaction.user_id, Transaction.amount, Transaction.type,
+    )
+    TRANSLATION_EXPORT_COLUMNS = (
+        Translation.id, Translation.timestamp, Translation.user_id, Translation.source_lang,
+        Translation.target_lang, Translation.cost, Translation.input_text, Translation.output_text,
+    )
 
     @staticmethod
-    async def view_transactions(db: AsyncSession, user_id: str = None):
-        query = select(Transaction)
+    async def stream_transactions(db: AsyncSession, user_id: str = None) -> AsyncIterator[dict]:
+        query = select(*AdminActions.TRANSACTION_EXPORT_COLUMNS).order_by(Transaction.timestamp)
         if user_id:
             query = query.where(Transaction.user_id == user_id)
-        result = await db.execute(query)
-        return result.scalars().all()
+        result = await db.stream(query.execution_options(yield_per=AdminActions.EXPORT_YIELD_PER))
+        async for row in result.mappings():
+            yield dict(row)
 
     @staticmethod
-    async def view_translations(db: AsyncSession, user_id: str = None):
-        query = select(Translation)
+    async def stream_translations(db: AsyncSession, user_id: str = None) -> AsyncIterator[dict]:
+        query = select(*AdminActions.TRANSLATION_EXPORT_COLUMNS).order_by(Translation.timestamp)
         if user_id:
             query = query.where(Translation.user_id == user_id)
-        result = await db.execute(query)
-        return result.scalars().all()
\ No newline at end of file
+        result = await db.stream(query.execution_options(yield_per=AdminActions.EXPORT_YIELD_PER))
+        async for row in result.mappings():
+            yield dict(row)
+
+    # Агрегаты считаются в БД через GROUP BY
+
+    @staticmethod
+    async def spend_by_user(
+            db: AsyncSession, since: Optional[datetime] = None, until: Optional[datetime] = None
+    ) -> List[dict]:
+        query = (
+            select(
+                Transaction.user_id,
+                func.sum(Transaction.amount).label("spent"),
+                func.count().label("operations"),
+            )
+            .where(Transaction.type == "Списание")
+            .group_by(Transaction.user_id)
+            .order_by(func.sum(Transaction.amount).desc())
+        )
+        query = AdminActions._period(query, Transaction.timestamp, since, until)
+        return [dict(row) for row in (await db.execute(query)).mappings()]
+
+    @staticmethod
+    async def daily_volume(
+            db: AsyncSession, since: Optional[datetime] = None, until: Optional[datetime] = None
+    ) -> List[dict]:
+        day = func.date(Translation.timestamp).label("day")
+        query = (
+            select(day, func.count().label("translations"), func.sum(Translation.cost).label("cost"))
+            .group_by(day)
+            .order_by(day)
+        )
+        query = AdminActions._period(query, Translation.timestamp, since, until)
+        return [dict(row) for row in (await db.execute(query)).mappings()]
+
+    @staticmethod
+    async def language_pair_counts(
+            db: AsyncSession, since: Optional[datetime] = None, until: Optional[datetime] = None
+    ) -> List[dict]:
+        query = (
+            select(Translation.source_lang, Translation.target_lang, func.count().label("translations"))
+            .group_by(Translation.source_lang, Translation.target_lang)
+            .order_by(func.count().desc())
+        )
+        query = AdminActions._period(query, Translation.timestamp, since, until)
+        return [dict(row) for row in (await db.execute(query)).mappings()]
+
+    @staticmethod
+    def _period(query, column, since: Optional[datetime], until: Optional[datetime]):
+        if since:
+            query = query.where(column >= since)
+        if until:
+            query = query.where(column < until)
+        return query
@@ -0,0 +1,205 @@
+"""
+Холодный архив истории: помесячные партиции translations/transactions старше
+ARCHIVE_AFTER_MONTHS выгружаются в сжатый JSONL и удаляются из БД.
+    python -m services.archive        # разовый прогон (cron)
+"""
+import asyncio
+import gzip
+import json
+import logging
+import os
+import shutil
+import zlib
+from collections import Counter
+from datetime import date, datetime
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import text
+
+from database.config import get_settings
+from database.database import engine
+from services.partitions import PARTITIONED_TABLES, ensure_partitions, list_partitions, month_start, split_default
+from utils.clock import UtcClock
+
+logger = logging.getLogger(__name__)
+
+Cursor = Tuple[datetime, str]
+
+
+class HistoryArchive:
+    """
+    Раскладка: <dir>/<table>/<YYYY-MM>/
+      shard-NN.jsonl.gz — строки пользователей с crc32(user_id) % shards == NN,
+                          по user_id, внутри пользователя (timestamp DESC, id DESC);
+      index.json.gz     — {user_id: число строк}, чтобы не открывать шарды зря;
+      manifest.json     — пишется последним, месяц без него не читается.
+    """
+
+    def __init__(self, directory: str, shards: int):
+        self.directory = directory
+        self.shards = shards
+        self._index = lru_cache(maxsize=64)(self._load_index)
+
+    def _month_dir(self, table: str, month: date) -> str:
+        return os.path.join(self.directory, table, f"{month.year:04d}-{month.month:02d}")
+
+    def _shard(self, user_id: str) -> int:
+        return zlib.crc32(user_id.encode()) % self.shards
+
+    def months(self, table: str) -> List[date]:
+        root = os.path.join(self.directory, table)
+        if not os.path.isdir(root):
+            return []
+        months = []
+        for name in os.listdir(root):
+            if os.path.exists(os.path.join(root, name, "manifest.json")):
+                year, month = name.split("-")
+                months.append(date(int(year), int(month), 1))
+        return sorted(months)
+
+    def _load_index(self, table: str, month: date) -> Dict[str, int]:
+        # архивный месяц не меняется, индекс можно держать в памяти
+        with gzip.open(os.path.join(self._month_dir(table, month), "index.json.gz"), "rt", encoding="utf-8") as f:
+            return json.load(f)
+
+    def read_user_rows(
+        self,
+        table: str,
+        user_id: str,
+        before: Optional[Cursor],
+        limit: int,
+        where: Optional[Callable[[dict], bool]] = None,
+    ) -> List[dict]:
+        """Строки пользователя в порядке (timestamp DESC, id DESC), строго после курсора."""
+        rows: List[dict] = []
+        for month in reversed(self.months(table)):
+            if before is not None and month > before[0].date():
+                continue
+            if user_id not in self._index(table, month):
+                continue
+            path = os.path.join(self._month_dir(table, month), f"shard-{self._shard(user_id):02d}.jsonl.gz")
+            seen = False
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                for line in f:
+                    row = json.loads(line)
+                    if row["user_id"] != user_id:
+                        if seen:
+                            break  # строки пользователя идут подряд
+                        continue
+                    seen = True
+                    row["timestamp"] = datetime.fromisoformat(row["timestamp"])
+                    if before is not None and (row["timestamp"], row["id"]) >= before:
+                        continue
+                    if where is not None and not where(row):
+                        continue
+                    rows.append(row)
+                    if len(rows) >= limit:
+                        return rows
+        return rows
+
+    async def archive_partition(self, table: str, partition: str, month: date, batch_rows: int) -> int:
+        """Выгружает партицию в файлы и только после этого отсоединяет и удаляет её."""
+        final_dir = self._month_dir(table, month)
+        tmp_dir = final_dir + ".tmp"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+
+        files: Dict[int, gzip.GzipFile] = {}
+        users: Counter = Counter()
+
+        def write(rows: List[dict]) -> None:
+            for row in rows:
+                shard = self._shard(row["user_id"])
+                if shard not in files:
+                    files[shard] = gzip.open(os.path.join(tmp_dir, f"shard-{shard:02d}.jsonl.gz"), "wt", encoding="utf-8")
+                files[shard].write(json.dumps(row, default=str, ensure_ascii=False) + "\n")
+                users[row["user_id"]] += 1
+
+        def finish(total: int) -> None:
+            for f in files.values():
+                f.close()
+            with gzip.open(os.path.join(tmp_dir, "index.json.gz"), "wt", encoding="utf-8") as f:
+                json.dump(users, f)
+            with open(os.path.join(tmp_dir, "manifest.json"), "w", encoding="utf-8") as f:
+                json.dump({"table": table, "partition": partition, "month": month.isoformat(),
+                           "rows": total, "shards": self.shards, "archived_at": UtcClock.now().isoformat()}, f)
+            shutil.rmtree(final_dir, ignore_errors=True)
+            os.replace(tmp_dir, final_dir)
+
+        total = 0
+        try:
+            async with engine.connect() as conn:
+                result = await conn.stream(
+                    text(f"SELECT * FROM {partition} ORDER BY user_id, timestamp DESC, id DESC")
+                    .execution_options(yield_per=batch_rows)
+                )
+                async for chunk in result.mappings().partitions(batch_rows):
+                    rows = [dict(row) for row in chunk]
+                    await asyncio.to_thread(write, rows)
+                    total += len(rows)
+            await asyncio.to_thread(finish, total)
+        except BaseException:
+            for f in files.values():
+                f.close()
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+
+        async with engine.begin() as conn:
+            await conn.execute(text(f"ALTER TABLE {table} DETACH PARTITION {partition}"))
+            await conn.execute(text(f"DROP TABLE {partition}"))
+        self._index.cache_clear()
+        logger.info("Archived %s (%s rows) to %s", partition, total, final_dir)
+        return total
+
+
+@lru_cache()
+def get_history_archive() -> HistoryArchive:
+    settings = get_settings()
+    return HistoryArchive(settings.ARCHIVE_DIR, settings.ARCHIVE_SHARDS)
+
+
+async def archive_old_partitions() -> Dict[str, int]:
+    """Все помесячные партиции, закончившиеся раньше чем ARCHIVE_AFTER_MONTHS назад."""
+    settings = get_settings()
+    if engine.dialect.name != "postgresql":
+        return {}
+    archive = get_history_archive()
+    cutoff = month_start(UtcClock.now(), -settings.ARCHIVE_AFTER_MONTHS)
+    archived = {}
+    for table in PARTITIONED_TABLES:
+        async with engine.begin() as conn:
+            await split_default(conn, table, cutoff)
+            partitions = await list_partitions(conn, table)
+        for partition, month in partitions:
+            if month_start(month, 1) <= cutoff:
+                archived[partition] = await archive.archive_partition(
+                    table, partition, month, settings.ARCHIVE_BATCH_ROWS
+                )
+    return archived
+
+
+async def maintenance_loop(archive: bool) -> None:
+    """Раз в PARTITION_MAINTENANCE_SECONDS: партиции на будущие месяцы и (archive) выгрузка старых."""
+    settings = get_settings()
+    while True:
+        try:
+            async with engine.begin() as conn:
+                await ensure_partitions(conn, settings.PARTITION_MONTHS_AHEAD)
+            if archive:
+                await archive_old_partitions()
+        except Exception:
+            logger.exception("History partition maintenance failed")
+        await asyncio.sleep(settings.PARTITION_MAINTENANCE_SECONDS)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+
+    async def _main():
+        async with engine.begin() as conn:
+            await ensure_partitions(conn, get_settings().PARTITION_MONTHS_AHEAD)
+        print(json.dumps(await archive_old_partitions()))
+        await engine.dispose()
+
+    asyncio.run(_main())
@@ -0,0 +1,140 @@
+import os
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, Tuple
+
+from database.config import get_settings
+
+LanguagePair = Tuple[str, str]
+
+
+class InferenceBackend(ABC):
+    """Способ загрузки модели пары; результат — transformers pipeline перевода."""
+
+    name: str
+
+    @abstractmethod
+    def load(self, model_name: str):
+        ...
+
+    def size_bytes(self, translator) -> int:
+        return _tensor_bytes(getattr(translator, "model", None))
+
+
+def _tensor_bytes(model) -> int:
+    if model is None or not hasattr(model, "state_dict"):
+        return 0
+    import torch
+
+    def size(value) -> int:
+        # у квантованных Linear веса лежат в упакованных кортежах, а не в parameters()
+        if isinstance(value, torch.Tensor):
+            if value.is_quantized:
+                return value.numel() * value.element_size()
+            return value.untyped_storage().nbytes() if value.numel() else 0
+        if isinstance(value, (tuple, list)):
+            return sum(size(v) for v in value)
+        return 0
+
+    return sum(size(v) for v in model.state_dict().values())
+
+
+class TorchBackend(InferenceBackend):
+    """fp32 PyTorch, как раньше."""
+
+    name = "torch"
+
+    def load(self, model_name: str):
+        from transformers import pipeline
+
+        return pipeline("translation", model=model_name)
+
+
+class QuantizedTorchBackend(InferenceBackend):
+    """Динамическая int8-квантизация Linear-слоёв (torch.ao.quantization)."""
+
+    name = "int8"
+
+    def load(self, model_name: str):
+        import torch
+        from transformers import AutoModelForSeq2SeqLM, AutoTokenizer, pipeline
+
+        model = AutoModelForSeq2SeqLM.from_pretrained(model_name).eval()
+        model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        tokenizer = AutoTokenizer.from_pretrained(model_name)
+        return pipeline("translation", model=model, tokenizer=tokenizer)
+
+
+class OnnxBackend(InferenceBackend):
+    """ONNX Runtime через optimum (опциональная зависимость)."""
+
+    name = "onnx"
+
+    def load(self, model_name: str):
+        try:
+            from optimum.onnxruntime import ORTModelForSeq2SeqLM
+        except ImportError:
+            raise ValueError("ONNX backend requires optimum[onnxruntime]")
+        from transformers import AutoTokenizer, pipeline
+
+        model = ORTModelForSeq2SeqLM.from_pretrained(model_name, export=True)
+        tokenizer = AutoTokenizer.from_pretrained(model_name)
+        return pipeline("translation", model=model, tokenizer=tokenizer)
+
+    def size_bytes(self, translator) -> int:
+        model_dir = getattr(translator.model, "model_save_dir", None)
+        if not model_dir:
+            return 0
+        return sum(
+            os.path.getsize(os.path.join(model_dir, f))
+            for f in os.listdir(model_dir)
+            if f.endswith((".onnx", ".onnx_data"))
+        )
+
+
+class FakeTranslator:
+    """Детерминированная замена pipeline с настраиваемой задержкой, без torch."""
+
+    def __init__(self, model_name: str, latency_ms: float, latency_per_text_ms: float):
+        self.tag = model_name.rsplit("-", 1)[-1]
+        self.latency_ms = latency_ms
+        self.latency_per_text_ms = latency_per_text_ms
+
+    def __call__(self, texts, batch_size=None):
+        if isinstance(texts, str):
+            texts = [texts]
+        time.sleep((self.latency_ms + self.latency_per_text_ms * len(texts)) / 1000)
+        return [{"translation_text": f"[{self.tag}] {text}"} for text in texts]
+
+
+class FakeBackend(InferenceBackend):
+    """Для нагрузочных тестов: измеряется сервис, а не модель."""
+
+    name = "fake"
+
+    def load(self, model_name: str):
+        settings = get_settings()
+        return FakeTranslator(
+            model_name, settings.FAKE_BACKEND_LATENCY_MS, settings.FAKE_BACKEND_LATENCY_PER_TEXT_MS
+        )
+
+    def size_bytes(self, translator) -> int:
+        return 0
+
+
+BACKENDS: Dict[str, InferenceBackend] = {
+    backend.name: backend
+    for backend in (TorchBackend(), QuantizedTorchBackend(), OnnxBackend(), FakeBackend())
+}
+
+
+def backend_for(pair: LanguagePair) -> InferenceBackend:
+    settings = get_settings()
+    overrides = {}
+    for item in filter(None, (part.strip() for part in settings.MODEL_BACKENDS.split(","))):
+        key, _, name = item.partition(":")
+        overrides[tuple(key.split("-", 1))] = name
+    name = overrides.get(pair, settings.MODEL_BACKEND)
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown model backend: {name}")
+    return BACKENDS[name]
@@ -0,0 +1,200 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Dict, List
+
+from database.config import get_settings
+from services.inference_executor import InferenceOverloaded, get_inference_executor
+from services.metrics import INFERENCE_BATCH_SIZE, INFERENCE_DURATION, INPUT_TOKENS
+from services.model_registry import LanguagePair, translate_batch
+from services.rate_limit import FairQueue, current_scheduling
+
+logger = logging.getLogger(__name__)
+
+
+def estimate_tokens(text: str) -> int:
+    # грубая оценка числа subword-токенов без загрузки токенизатора
+    return max(1, (len(text) + 3) // 4)
+
+
+def _translate_packed(pair: LanguagePair, groups: List[List[str]]) -> List[str]:
+    # группы близкой длины идут в пайплайн по очереди внутри одной задачи пула
+    outputs: List[str] = []
+    for texts in groups:
+        outputs.extend(translate_batch(pair, texts))
+    return outputs
+
+
+@dataclass
+class _Pending:
+    text: str
+    tokens: int
+    future: asyncio.Future
+
+
+class MicroBatcher:
+    """
+    Собирает конкурентные запросы одной языковой пары в общий вызов пайплайна.
+    Пачка отправляется по достижении max_batch_size, max_tokens (с учётом
+    паддинга) или по истечении max_wait_ms с момента первого запроса.
+    Пока все воркеры инференса заняты, запросы ждут здесь, в справедливой
+    очереди по пользователям, и следующая пачка набирается в её порядке;
+    внутри пачки сегменты сортируются по длине и делятся на группы без лишнего паддинга.
+    """
+
+    def __init__(self, pair: LanguagePair, max_batch_size: int, max_wait_ms: int, max_tokens: int, max_queued: int):
+        self.pair = pair
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.max_tokens = max_tokens
+        self.max_queued = max_queued
+        self.label = f"{pair[0]}-{pair[1]}"
+        self._queue = FairQueue()
+        self._queued_tokens = 0
+        self.rejected = 0
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        self._flushes: set[asyncio.Task] = set()
+
+    async def submit(self, text: str) -> str:
+        if len(self._queue) >= self.max_queued:
+            self.rejected += 1
+            raise InferenceOverloaded("Очередь инференса переполнена")
+
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done():
+            self._task = loop.create_task(self._run())
+
+        future = loop.create_future()
+        tokens = estimate_tokens(text)
+        INPUT_TOKENS.labels(self.label).observe(tokens)
+        scheduling = current_scheduling()
+        position = self._queue.push(
+            _Pending(text=text, tokens=tokens, future=future),
+            flow=scheduling.user_id if scheduling else None,
+            weight=scheduling.weight if scheduling else 1.0,
+            cost=tokens,
+        )
+        if scheduling is not None:
+            # позиция запроса — по его сегменту, который обслужат раньше остальных
+            if scheduling.queue_position is None or position < scheduling.queue_position:
+                scheduling.queue_position = position
+        self._queued_tokens += tokens
+        self._wakeup.set()
+        return await future
+
+    async def _wait(self, timeout: float | None = None) -> bool:
+        self._wakeup.clear()
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        executor = get_inference_executor()
+        backlog = False
+        while True:
+            while not self._queue:
+                await self._wait()
+            # окно набора пачки нужно только после простоя: остаток очереди уходит сразу
+            deadline = loop.time() + (0 if backlog else self.max_wait)
+            while not self._is_full():
+                timeout = deadline - loop.time()
+                if timeout <= 0 or not await self._wait(timeout):
+                    break
+            # пока воркеры заняты, очередь продолжает копиться и переупорядочиваться
+            await executor.wait_for_worker()
+            batch = self._take()
+            backlog = bool(self._queue)
+            if not batch:
+                continue
+            groups = self._pack(batch)
+            batch = [p for group in groups for p in group]
+            for group in groups:
+                INFERENCE_BATCH_SIZE.labels(self.label).observe(len(group))
+            result = executor.run(_translate_packed, self.pair, [[p.text for p in group] for group in groups])
+            task = loop.create_task(self._flush(batch, result))
+            self._flushes.add(task)
+            task.add_done_callback(self._flushes.discard)
+
+    def _is_full(self) -> bool:
+        return len(self._queue) >= self.max_batch_size or self._queued_tokens >= self.max_tokens
+
+    def _take(self) -> List[_Pending]:
+        # какие сегменты обслужить, решает порядок справедливой очереди;
+        # бюджет — суммарные токены, паддинг убирает _pack
+        batch: List[_Pending] = []
+        tokens = 0
+        while self._queue and len(batch) < self.max_batch_size:
+            item = self._queue.peek()
+            if batch and tokens + item.tokens > self.max_tokens:
+                break
+            self._queue.pop()
+            self._queued_tokens -= item.tokens
+            # запросы, чьи клиенты уже ушли, не переводим
+            if item.future.done():
+                continue
+            batch.append(item)
+            tokens += item.tokens
+        return batch
+
+    def _pack(self, batch: List[_Pending]) -> List[List[_Pending]]:
+        # сортировка по длине: в один вызов пайплайна попадают тексты близкой длины,
+        # бюджет вызова считается по паддингу (длина самого длинного * размер группы)
+        groups: List[List[_Pending]] = []
+        current: List[_Pending] = []
+        for item in sorted(batch, key=lambda p: p.tokens):
+            if current and item.tokens * (len(current) + 1) > self.max_tokens:
+                groups.append(current)
+                current = []
+            current.append(item)
+        if current:
+            groups.append(current)
+        return groups
+
+    @staticmethod
+    def _fail(batch: List[_Pending], exc: BaseException) -> None:
+        for p in batch:
+            if not p.future.done():
+                p.future.set_exception(exc)
+
+    async def _flush(self, batch: List[_Pending], result) -> None:
+        started = time.perf_counter()
+        try:
+            outputs = await result
+        except Exception as exc:
+            self._fail(batch, exc)
+            return
+        finally:
+            INFERENCE_DURATION.labels(self.label).observe(time.perf_counter() - started)
+        for p, output in zip(batch, outputs):
+            if not p.future.done():
+                p.future.set_result(output)
+
+    def stats(self) -> dict:
+        return {"queued": len(self._queue), "queued_tokens": self._queued_tokens, "rejected": self.rejected}
+
+
+_batchers: Dict[LanguagePair, MicroBatcher] = {}
+
+
+def get_batcher(pair: LanguagePair) -> MicroBatcher:
+    batcher = _batchers.get(pair)
+    if batcher is None:
+        settings = get_settings()
+        batcher = MicroBatcher(
+            pair,
+            max_batch_size=settings.BATCH_MAX_SIZE,
+            max_wait_ms=settings.BATCH_MAX_WAIT_MS,
+            max_tokens=settings.BATCH_MAX_TOKENS,
+            max_queued=settings.FAIR_QUEUE_MAX_ITEMS,
+        )
+        _batchers[pair] = batcher
+    return batcher
+
+
+def batcher_stats() -> dict:
+    return {f"{src}-{tgt}": batcher.stats() for (src, tgt), batcher in _batchers.items()}
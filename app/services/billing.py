@@ -0,0 +1,158 @@
+import asyncio
+import uuid
+from typing import List, Optional
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.exc import NoResultFound
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database.database import async_session
+from models.transaction import Transaction
+from models.translation import Translation
+from models.wallet import Wallet
+from services.ledger import get_ledger
+from services.translation_cache import text_hash
+from services.translation_memory import get_translation_memory
+from services.user_cache import get_user_cache
+from utils.clock import UtcClock
+
+
+async def reserve(db: AsyncSession, user_id: str, cost: int) -> int:
+    """
+    Атомарно резервирует стоимость на счёте и сразу фиксирует транзакцию,
+    чтобы соединение вернулось в пул до начала инференса.
+    Возвращает баланс после резерва.
+    """
+    res = await db.execute(
+        update(Wallet)
+        .where(Wallet.user_id == user_id, Wallet.balance >= cost)
+        .values(balance=Wallet.balance - cost)
+        .returning(Wallet.balance)
+        .execution_options(synchronize_session=False)
+    )
+    balance = res.scalar_one_or_none()
+    if balance is None:
+        await db.rollback()
+        exists = (await db.execute(select(Wallet.id).where(Wallet.user_id == user_id))).scalar_one_or_none()
+        await db.rollback()
+        raise ValueError("Недостаточно средств на балансе" if exists else "Счет не найден")
+    await get_user_cache().publish(db, user_id)
+    await db.commit()
+    get_user_cache().set_balance(user_id, balance)
+    return balance
+
+
+async def refund(user_id: str, amount: int, db: Optional[AsyncSession] = None) -> None:
+    """Возвращает резерв, если перевод не состоялся."""
+    if amount <= 0:
+        return
+    if db is None:
+        async with async_session() as own_db:
+            await refund(user_id, amount, own_db)
+        return
+    balance = await _credit(db, user_id, amount)
+    await db.commit()
+    get_user_cache().set_balance(user_id, balance)
+
+
+async def deposit(db: AsyncSession, user_id: str, amount: int, kind: str) -> int:
+    """
+    Пополнение (kind — тип операции в истории) одним UPDATE ... RETURNING и запись
+    в историю одним commit: конкурентные операции со счётом не затирают друг друга.
+    Возвращает баланс после пополнения.
+    """
+    try:
+        balance = await _credit(db, user_id, amount)
+    except NoResultFound:
+        await db.rollback()
+        raise ValueError("Счет не найден")
+    await db.execute(insert(Transaction), [{
+        "id": str(uuid.uuid4()),
+        "timestamp": UtcClock.now(),
+        "user_id": user_id,
+        "amount": amount,
+        "type": kind,
+    }])
+    await db.commit()
+    get_user_cache().set_balance(user_id, balance)
+    return balance
+
+
+async def settle(db: AsyncSession, user_id: str, reserved: int, rows: List[dict]) -> int:
+    """
+    Одна транзакция на завершение запроса: история переводов, запись списания
+    и возврат неиспользованной части резерва. Возвращает списанную сумму.
+    С LEDGER_WRITE_BEHIND история уходит в буфер, а синхронно пишется только возврат.
+    Если транзакция расчёта не прошла, весь резерв возвращается.
+    """
+    charged = sum(row["cost"] for row in rows)
+    history = []
+    if rows:
+        history.append((Translation, rows))
+        history.append((Transaction, [{
+            "id": str(uuid.uuid4()),
+            "timestamp": UtcClock.now(),
+            "user_id": user_id,
+            "amount": charged,
+            "type": "Списание",
+        }]))
+
+    ledger = get_ledger()
+    balance = None
+    try:
+        if reserved > charged:
+            balance = await _credit(db, user_id, reserved - charged)
+        if ledger is None:
+            for model, model_rows in history:
+                await db.execute(insert(model), model_rows)
+        await db.commit()
+    except BaseException:
+        # резерв уже зафиксирован: без истории и списания он возвращается целиком
+        await asyncio.shield(_abort_settle(db, user_id, reserved))
+        raise
+    if balance is not None:
+        get_user_cache().set_balance(user_id, balance)
+
+    if ledger is not None:
+        for model, model_rows in history:
+            await ledger.add(model, model_rows)
+
+    memory = get_translation_memory()
+    if memory is not None:
+        for row in rows:
+            memory.add(row["source_lang"], row["target_lang"], row["input_text"], row["output_text"])
+    return charged
+
+
+async def _abort_settle(db: AsyncSession, user_id: str, reserved: int) -> None:
+    await db.rollback()
+    # своя сессия: соединение db могло сломаться вместе с расчётом
+    await refund(user_id, reserved)
+
+
+def translation_row(
+    user_id: str, input_text: str, output_text: str, source_lang: str, target_lang: str, cost: int
+) -> dict:
+    return {
+        "id": str(uuid.uuid4()),
+        "timestamp": UtcClock.now(),
+        "user_id": user_id,
+        "input_text": input_text,
+        "output_text": output_text,
+        "input_hash": text_hash(input_text),
+        "source_lang": source_lang,
+        "target_lang": target_lang,
+        "cost": cost,
+    }
+
+
+async def _credit(db: AsyncSession, user_id: str, amount: int) -> int:
+    res = await db.execute(
+        update(Wallet)
+        .where(Wallet.user_id == user_id)
+        .values(balance=Wallet.balance + amount)
+        .returning(Wallet.balance)
+        .execution_options(synchronize_session=False)
+    )
+    await get_user_cache().publish(db, user_id)
+    return res.scalar_one()
@@ -0,0 +1,112 @@
+import asyncio
+import json
+import logging
+from abc import ABC, abstractmethod
+from typing import Awaitable, Callable, Optional
+
+from database.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[[dict], Awaitable[None]]
+
+
+class Broker(ABC):
+    """Очередь задач перевода: веб-процесс публикует, воркер потребляет."""
+
+    @abstractmethod
+    async def publish(self, message: dict) -> None:
+        ...
+
+    @abstractmethod
+    async def consume(self, handler: Handler, concurrency: int = 1) -> None:
+        """Обрабатывает сообщения, пока задача не будет отменена."""
+
+    async def close(self) -> None:
+        pass
+
+
+class InMemoryBroker(Broker):
+    """Брокер в памяти процесса: для разработки и тестов без RabbitMQ."""
+
+    def __init__(self):
+        self._queue: "asyncio.Queue[dict]" = asyncio.Queue()
+
+    async def publish(self, message: dict) -> None:
+        await self._queue.put(message)
+
+    async def consume(self, handler: Handler, concurrency: int = 1) -> None:
+        async def worker():
+            while True:
+                message = await self._queue.get()
+                try:
+                    await handler(message)
+                except Exception:
+                    logger.exception("Job handler failed for %s", message)
+                finally:
+                    self._queue.task_done()
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+
+class RabbitMQBroker(Broker):
+    def __init__(self, url: str, queue_name: str):
+        self.url = url
+        self.queue_name = queue_name
+        self._connection = None
+        self._channel = None
+
+    async def _get_channel(self):
+        import aio_pika
+
+        if self._channel is None or self._channel.is_closed:
+            self._connection = await aio_pika.connect_robust(self.url)
+            self._channel = await self._connection.channel()
+            await self._channel.declare_queue(self.queue_name, durable=True)
+        return self._channel
+
+    async def publish(self, message: dict) -> None:
+        import aio_pika
+
+        channel = await self._get_channel()
+        await channel.default_exchange.publish(
+            aio_pika.Message(
+                body=json.dumps(message).encode(),
+                content_type="application/json",
+                delivery_mode=aio_pika.DeliveryMode.PERSISTENT,
+            ),
+            routing_key=self.queue_name,
+        )
+
+    async def consume(self, handler: Handler, concurrency: int = 1) -> None:
+        channel = await self._get_channel()
+        await channel.set_qos(prefetch_count=concurrency)
+        queue = await channel.declare_queue(self.queue_name, durable=True)
+
+        async def on_message(message):
+            # при падении обработчика сообщение возвращается в очередь
+            async with message.process(requeue=True):
+                await handler(json.loads(message.body))
+
+        await queue.consume(on_message)
+        await asyncio.Future()
+
+    async def close(self) -> None:
+        if self._connection is not None:
+            await self._connection.close()
+            self._connection = None
+            self._channel = None
+
+
+_broker: Optional[Broker] = None
+
+
+def get_broker() -> Broker:
+    global _broker
+    if _broker is None:
+        settings = get_settings()
+        if settings.BROKER_URL:
+            _broker = RabbitMQBroker(settings.BROKER_URL, settings.JOBS_QUEUE_NAME)
+        else:
+            _broker = InMemoryBroker()
+    return _broker
@@ -0,0 +1,323 @@
+import asyncio
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Mapping, Optional, Tuple
+
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import Response, StreamingResponse
+from sqlalchemy import delete, update
+from sqlalchemy.exc import IntegrityError
+
+from database.config import get_settings
+from database.database import async_session
+from models.idempotency import IdempotencyKey
+
+JSON = "application/json"
+NDJSON = "application/x-ndjson"
+REPLAY_HEADER = "Idempotent-Replayed"
+POLL_SECONDS = 0.1
+PURGE_SECONDS = 600
+
+
+@dataclass
+class StoredResponse:
+    status_code: int
+    media_type: str
+    body: str
+    fingerprint: str
+    expires_at: float
+
+
+class _Aborted(Exception):
+    """Первый запрос с ключом не дал сохраняемого ответа: ожидающие повторяют попытку сами."""
+
+
+def _cacheable(status_code: int) -> bool:
+    # 5xx, 409 и 429 — временные состояния, повтор должен выполниться заново
+    return status_code < 500 and status_code not in (409, 429)
+
+
+def _fingerprint(payload: Any) -> str:
+    return hashlib.sha256(json.dumps(jsonable_encoder(payload), sort_keys=True).encode()).hexdigest()
+
+
+class IdempotencyStore:
+    """
+    Ответы на запросы с Idempotency-Key: LRU с TTL в памяти процесса и
+    (IDEMPOTENCY_PERSISTENT) таблица idempotency_keys, общая для воркеров.
+    Пока первый запрос выполняется, повторы с тем же ключом ждут его ответа
+    (не дольше wait_seconds). Заявка старше lease_seconds считается брошенной:
+    например, стрим, который так и не начал отдаваться.
+    """
+
+    def __init__(self, ttl_seconds: int, max_entries: int, persistent: bool, wait_seconds: float, lease_seconds: float):
+        self.ttl = ttl_seconds
+        self.max_entries = max_entries
+        self.persistent = persistent
+        self.wait_seconds = wait_seconds
+        self.lease = lease_seconds
+        self._entries: "OrderedDict[str, StoredResponse]" = OrderedDict()
+        self._inflight: Dict[str, Tuple[asyncio.Future, float]] = {}
+        self.replayed = 0
+        self.joined = 0
+        self.executed = 0
+        self.purged = 0
+        self._next_purge = 0.0
+
+    def _get(self, key: str) -> Optional[StoredResponse]:
+        stored = self._entries.get(key)
+        if stored is None:
+            return None
+        if stored.expires_at < time.time():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return stored
+
+    def _put(self, key: str, stored: StoredResponse) -> None:
+        self._entries[key] = stored
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def begin(self, key: str, fingerprint: str) -> Optional[StoredResponse]:
+        """Сохранённый ответ или None, если запрос выполняет вызывающий (ключ захвачен)."""
+        while True:
+            stored = self._get(key)
+            if stored is not None:
+                self.replayed += 1
+                return stored
+            inflight = self._inflight.get(key)
+            if inflight is not None:
+                future, claimed_at = inflight
+                if time.monotonic() - claimed_at > self.lease:
+                    self._resolve(key, None)
+                    continue
+                try:
+                    stored = await asyncio.wait_for(asyncio.shield(future), self.wait_seconds)
+                except _Aborted:
+                    continue
+                except asyncio.TimeoutError:
+                    raise HTTPException(status_code=409, detail="Запрос с этим Idempotency-Key ещё выполняется")
+                self.joined += 1
+                return stored
+
+            self._inflight[key] = (asyncio.get_running_loop().create_future(), time.monotonic())
+            if not self.persistent:
+                return None
+            try:
+                stored = await self._claim_db(key, fingerprint)
+            except BaseException:
+                self._resolve(key, None)
+                raise
+            if stored is None:
+                return None
+            self._put(key, stored)
+            self._resolve(key, stored)
+            self.replayed += 1
+            return stored
+
+    async def _claim_db(self, key: str, fingerprint: str) -> Optional[StoredResponse]:
+        # строка-заявка без status_code: другие воркеры видят, что запрос выполняется
+        deadline = time.monotonic() + self.wait_seconds
+        async with async_session() as db:
+            while True:
+                now = datetime.utcnow()
+                db.add(IdempotencyKey(key=key, fingerprint=fingerprint, expires_at=now + timedelta(seconds=self.ttl)))
+                try:
+                    await db.commit()
+                    return None
+                except IntegrityError:
+                    await db.rollback()
+
+                row = await db.get(IdempotencyKey, key, populate_existing=True)
+                await db.rollback()
+                if row is None:
+                    continue  # заявку только что сняли, пробуем снова
+                stale = row.status_code is None and row.created_at < now - timedelta(seconds=self.lease)
+                if row.expires_at < now or stale:
+                    await db.execute(delete(IdempotencyKey).where(IdempotencyKey.key == key))
+                    await db.commit()
+                    continue
+                if row.status_code is not None:
+                    return StoredResponse(
+                        row.status_code, row.media_type, row.body, row.fingerprint,
+                        expires_at=time.time() + (row.expires_at - now).total_seconds(),
+                    )
+                if time.monotonic() >= deadline:
+                    raise HTTPException(status_code=409, detail="Запрос с этим Idempotency-Key ещё выполняется")
+                await asyncio.sleep(POLL_SECONDS)
+
+    async def complete(self, key: str, status_code: int, media_type: str, body: str, fingerprint: str) -> StoredResponse:
+        stored = StoredResponse(status_code, media_type, body, fingerprint, time.time() + self.ttl)
+        self.executed += 1
+        self._put(key, stored)
+        self._resolve(key, stored)
+        if self.persistent:
+            async with async_session() as db:
+                await db.execute(
+                    update(IdempotencyKey)
+                    .where(IdempotencyKey.key == key)
+                    .values(status_code=status_code, media_type=media_type, body=body)
+                )
+                if time.monotonic() >= self._next_purge:
+                    # просроченные строки никто не читает: чистка по индексу expires_at
+                    self._next_purge = time.monotonic() + PURGE_SECONDS
+                    result = await db.execute(
+                        delete(IdempotencyKey).where(IdempotencyKey.expires_at < datetime.utcnow())
+                    )
+                    self.purged += result.rowcount or 0
+                await db.commit()
+        return stored
+
+    async def abort(self, key: str) -> None:
+        self._resolve(key, None)
+        if self.persistent:
+            async with async_session() as db:
+                await db.execute(delete(IdempotencyKey).where(IdempotencyKey.key == key))
+                await db.commit()
+
+    def _resolve(self, key: str, stored: Optional[StoredResponse]) -> None:
+        inflight = self._inflight.pop(key, None)
+        if inflight is None or inflight[0].done():
+            return
+        future = inflight[0]
+        if stored is not None:
+            future.set_result(stored)
+        else:
+            future.set_exception(_Aborted())
+            future.exception()  # без ожидающих исключение не должно попадать в лог
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "in_flight": len(self._inflight),
+            "executed": self.executed,
+            "replayed": self.replayed,
+            "joined": self.joined,
+            "purged": self.purged,
+        }
+
+
+@lru_cache()
+def get_idempotency_store() -> IdempotencyStore:
+    settings = get_settings()
+    return IdempotencyStore(
+        ttl_seconds=settings.IDEMPOTENCY_TTL_SECONDS,
+        max_entries=settings.IDEMPOTENCY_MAX_ENTRIES,
+        persistent=settings.IDEMPOTENCY_PERSISTENT,
+        wait_seconds=settings.IDEMPOTENCY_WAIT_SECONDS,
+        lease_seconds=settings.IDEMPOTENCY_LEASE_SECONDS,
+    )
+
+
+def _scope_key(user_id: str, route: str, idempotency_key: str) -> str:
+    return hashlib.sha256(f"{user_id}\n{route}\n{idempotency_key}".encode()).hexdigest()
+
+
+def _replay(stored: StoredResponse, fingerprint: str) -> Response:
+    if stored.fingerprint != fingerprint:
+        raise HTTPException(status_code=422, detail="Idempotency-Key уже использован с другим запросом")
+    return Response(
+        stored.body, status_code=stored.status_code, media_type=stored.media_type, headers={REPLAY_HEADER: "true"}
+    )
+
+
+async def idempotent(
+    idempotency_key: Optional[str],
+    user_id: str,
+    route: str,
+    payload: Any,
+    handler: Callable[[], Awaitable[Any]],
+    status_code: int = 200,
+) -> Any:
+    """
+    Выполняет handler один раз на (пользователь, маршрут, ключ). Без ключа — как раньше.
+    Ответ (включая HTTPException с кэшируемым статусом) сохраняется и отдаётся повторам.
+    """
+    if not idempotency_key:
+        return await handler()
+
+    store = get_idempotency_store()
+    key = _scope_key(user_id, route, idempotency_key)
+    fingerprint = _fingerprint(payload)
+    stored = await store.begin(key, fingerprint)
+    if stored is not None:
+        return _replay(stored, fingerprint)
+
+    try:
+        result = await handler()
+    except HTTPException as exc:
+        if _cacheable(exc.status_code):
+            body = json.dumps({"detail": exc.detail}, ensure_ascii=False)
+            await store.complete(key, exc.status_code, JSON, body, fingerprint)
+        else:
+            await asyncio.shield(store.abort(key))
+        raise
+    except BaseException:
+        await asyncio.shield(store.abort(key))
+        raise
+
+    body = json.dumps(jsonable_encoder(result), ensure_ascii=False)
+    await store.complete(key, status_code, JSON, body, fingerprint)
+    return result
+
+
+async def idempotent_stream(
+    idempotency_key: Optional[str],
+    user_id: str,
+    route: str,
+    payload: Any,
+    start: Callable[[], Awaitable[AsyncIterator[str]]],
+    headers: Optional[Mapping[str, str]] = None,
+) -> Response:
+    """
+    Вариант для NDJSON-стрима: start() делает проверки и резерв и возвращает генератор строк.
+    Сохраняется весь стрим, если он дошёл до строки с "done"; повтор получает его целиком.
+    headers читаются после start(), который может их дополнить.
+    """
+    if not idempotency_key:
+        lines = await start()
+        return StreamingResponse(lines, media_type=NDJSON, headers=headers)
+
+    store = get_idempotency_store()
+    key = _scope_key(user_id, route, idempotency_key)
+    fingerprint = _fingerprint(payload)
+    stored = await store.begin(key, fingerprint)
+    if stored is not None:
+        return _replay(stored, fingerprint)
+
+    try:
+        lines = await start()
+    except HTTPException as exc:
+        if _cacheable(exc.status_code):
+            body = json.dumps({"detail": exc.detail}, ensure_ascii=False)
+            await store.complete(key, exc.status_code, JSON, body, fingerprint)
+        else:
+            await asyncio.shield(store.abort(key))
+        raise
+    except BaseException:
+        await asyncio.shield(store.abort(key))
+        raise
+
+    async def recorded() -> AsyncIterator[str]:
+        collected = []
+        completed = False
+        try:
+            async for line in lines:
+                collected.append(line)
+                yield line
+            completed = bool(collected) and json.loads(collected[-1]).get("done") is True
+        finally:
+            if completed:
+                await asyncio.shield(store.complete(key, 200, NDJSON, "".join(collected), fingerprint))
+            else:
+                await asyncio.shield(store.abort(key))
+
+    return StreamingResponse(recorded(), media_type=NDJSON, headers=headers)
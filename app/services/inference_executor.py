@@ -0,0 +1,113 @@
+import asyncio
+import logging
+import multiprocessing
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Awaitable, Callable, Optional
+
+from database.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+class InferenceOverloaded(Exception):
+    """Очередь инференса заполнена, запрос нужно отклонить."""
+
+
+def _timed_call(fn: Callable, *args):
+    # time.monotonic общий для процессов на Linux, поэтому подходит и для process pool
+    return time.monotonic(), fn(*args)
+
+
+class InferenceExecutor:
+    """
+    Выделенный пул для блокирующего инференса: event loop остаётся свободным
+    для остальных эндпоинтов. Очередь и отказ при переполнении — в батчере
+    (FAIR_QUEUE_MAX_ITEMS), он отдаёт работу только свободным воркерам.
+    """
+
+    def __init__(self, kind: str, workers: int):
+        if kind == "process":
+            # spawn: форк процесса с уже поднятыми потоками torch небезопасен
+            self._pool: Executor = ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        elif kind == "thread":
+            self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="inference")
+        else:
+            raise ValueError(f"Unknown inference executor: {kind}")
+        self.kind = kind
+        self.workers = workers
+        self._pending = 0
+        self._released = asyncio.Event()
+        self.completed = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    @property
+    def queue_depth(self) -> int:
+        return max(0, self._pending - self.workers)
+
+    def run(self, fn: Callable, *args) -> Awaitable:
+        """
+        Задача ставится в пул сразу при вызове (счётчик занятости обновляется
+        синхронно), результат нужно дождаться через await.
+        """
+        loop = asyncio.get_running_loop()
+        self._pending += 1
+        future = loop.run_in_executor(self._pool, _timed_call, fn, *args)
+        future.add_done_callback(self._release)
+        return self._result(future, time.monotonic())
+
+    def _release(self, _) -> None:
+        self._pending -= 1
+        self._released.set()
+
+    async def wait_for_worker(self) -> None:
+        """Ждёт свободного воркера: очередь копится у вызывающего, а не в FIFO пула."""
+        while self._pending >= self.workers:
+            self._released.clear()
+            await self._released.wait()
+
+    async def _result(self, future: asyncio.Future, submitted: float):
+        started, result = await future
+        wait = max(0.0, started - submitted)
+        self.completed += 1
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+        return result
+
+    def stats(self) -> dict:
+        return {
+            "kind": self.kind,
+            "workers": self.workers,
+            "in_flight": self._pending,
+            "queue_depth": self.queue_depth,
+            "completed": self.completed,
+            "avg_wait_seconds": round(self.total_wait / self.completed, 4) if self.completed else 0.0,
+            "max_wait_seconds": round(self.max_wait, 4),
+        }
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+_executor: Optional[InferenceExecutor] = None
+
+
+def get_inference_executor() -> InferenceExecutor:
+    global _executor
+    if _executor is None:
+        settings = get_settings()
+        _executor = InferenceExecutor(
+            settings.INFERENCE_EXECUTOR,
+            workers=settings.INFERENCE_WORKERS,
+        )
+    return _executor
+
+
+def shutdown_inference_executor() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown()
+        _executor = None
@@ -0,0 +1,167 @@
+import asyncio
+import logging
+from typing import Dict, List, Optional, Type
+
+from sqlalchemy import insert
+from sqlalchemy.exc import DataError, IntegrityError
+
+from database.config import get_settings
+from database.database import Base, async_session
+from models.transaction import Transaction
+from models.translation import Translation
+
+logger = logging.getLogger(__name__)
+
+MAX_RETRY_SECONDS = 5.0
+
+
+class LedgerBuffer:
+    """
+    Отложенная запись истории (Translation, Transaction).
+    Строки копятся в памяти и сбрасываются одним multi-row INSERT на таблицу
+    раз в flush_interval_ms или при накоплении flush_rows строк.
+    Балансы сюда не попадают: они меняются синхронно в billing.
+    В буфере не больше max_rows строк: при заполнении запись ждёт фонового сброса.
+    Строку, которую БД отвергает (нарушение ограничения, неверные данные), сброс
+    находит делением пачки и откладывает в лог, чтобы она не блокировала остальные.
+    """
+
+    def __init__(self, flush_interval_ms: int, flush_rows: int, max_rows: int):
+        self.flush_interval = flush_interval_ms / 1000
+        self.flush_rows = flush_rows
+        self.max_rows = max_rows
+        self._pending: Dict[Type[Base], List[dict]] = {Translation: [], Transaction: []}
+        self._size = 0
+        self._lock = asyncio.Lock()
+        self._wake = asyncio.Event()
+        self._drained = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.flushes = 0
+        self.flushed_rows = 0
+        self.failures = 0
+        self.quarantined = 0
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def add(self, model: Type[Base], rows: List[dict]) -> None:
+        # буфер полон: запрос ждёт сброса, а не растит буфер и окно потери
+        while self._size and self._size + len(rows) > self.max_rows:
+            if self._task is None:
+                await self.flush()
+                continue
+            self._drained.clear()
+            self._wake.set()
+            await self._drained.wait()
+        self._pending[model].extend(rows)
+        self._size += len(rows)
+        if self._size >= self.flush_rows:
+            self._wake.set()
+
+    async def _run(self) -> None:
+        delay = self.flush_interval
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                await self.flush()
+                delay = self.flush_interval
+            except Exception:
+                logger.exception("Ledger flush failed, rows kept for retry")
+                # пока БД недоступна, повторы реже, даже если ожидающие будят цикл
+                delay = min(max(delay, self.flush_interval) * 2, MAX_RETRY_SECONDS)
+                await asyncio.sleep(delay)
+
+    async def flush(self) -> None:
+        async with self._lock:
+            if not self._size:
+                self._drained.set()
+                return
+            batch = self._pending
+            self._pending = {model: [] for model in batch}
+            self._size = 0
+            try:
+                try:
+                    await self._write(batch)
+                    written = sum(len(rows) for rows in batch.values())
+                except (IntegrityError, DataError):
+                    written = await self._write_isolating(batch)
+            except Exception:
+                self.failures += 1
+                # batch содержит только незаписанные строки
+                for model, rows in batch.items():
+                    self._pending[model][:0] = rows
+                    self._size += len(rows)
+                raise
+            self.flushes += 1
+            self.flushed_rows += written
+            self._drained.set()
+
+    @staticmethod
+    async def _write(batch: Dict[Type[Base], List[dict]]) -> None:
+        async with async_session() as db:
+            # Translation раньше Transaction, порядок как в синхронном пути
+            for model, rows in batch.items():
+                if rows:
+                    await db.execute(insert(model), rows)
+            await db.commit()
+
+    async def _write_isolating(self, batch: Dict[Type[Base], List[dict]]) -> int:
+        """Пишет пачку частями, деля отвергнутые куски пополам до одной строки."""
+        written = 0
+        for model in batch:
+            chunks = [batch[model]] if batch[model] else []
+            while chunks:
+                rows = chunks.pop(0)
+                try:
+                    await self._write({model: rows})
+                    written += len(rows)
+                except (IntegrityError, DataError) as exc:
+                    if len(rows) > 1:
+                        middle = len(rows) // 2
+                        chunks[:0] = [rows[:middle], rows[middle:]]
+                    else:
+                        self.quarantined += 1
+                        logger.error("Ledger row rejected and dropped from %s: %s (%s)",
+                                     model.__tablename__, rows[0], exc.orig)
+                except Exception:
+                    chunks.insert(0, rows)
+                    raise
+                finally:
+                    batch[model] = [row for chunk in chunks for row in chunk]
+        return written
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        await self.flush()
+
+    def stats(self) -> dict:
+        return {
+            "buffered_rows": self._size,
+            "flushes": self.flushes,
+            "flushed_rows": self.flushed_rows,
+            "failures": self.failures,
+            "quarantined": self.quarantined,
+        }
+
+
+_ledger: Optional[LedgerBuffer] = None
+
+
+def get_ledger() -> Optional[LedgerBuffer]:
+    """None, если отложенная запись выключена (LEDGER_WRITE_BEHIND)."""
+    global _ledger
+    settings = get_settings()
+    if _ledger is None and settings.LEDGER_WRITE_BEHIND:
+        _ledger = LedgerBuffer(
+            flush_interval_ms=settings.LEDGER_FLUSH_INTERVAL_MS,
+            flush_rows=settings.LEDGER_FLUSH_ROWS,
+            max_rows=settings.LEDGER_MAX_ROWS,
+        )
+    return _ledger
@@ -0,0 +1,167 @@
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Optional
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+from prometheus_client.core import GaugeMetricFamily
+from prometheus_client.multiprocess import MultiProcessCollector
+from sqlalchemy import event
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+TOKEN_BUCKETS = (8, 16, 32, 64, 128, 256, 512, 1024, 2048)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 50)
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds", "Время ответа по маршруту",
+    ["method", "route", "status"], buckets=LATENCY_BUCKETS,
+)
+STAGE_DURATION = Histogram(
+    "translation_stage_duration_seconds", "Этапы обработки перевода (reserve, inference, settle)",
+    ["stage"], buckets=LATENCY_BUCKETS,
+)
+INFERENCE_DURATION = Histogram(
+    "inference_batch_duration_seconds", "Вызов модели на пачку, включая ожидание в пуле инференса",
+    ["pair"], buckets=LATENCY_BUCKETS,
+)
+INFERENCE_BATCH_SIZE = Histogram(
+    "inference_batch_size", "Текстов в одном вызове модели",
+    ["pair"], buckets=(1, 2, 4, 8, 16, 32, 64),
+)
+INPUT_TOKENS = Histogram(
+    "translation_input_tokens", "Оценка числа входных токенов на сегмент",
+    ["pair"], buckets=TOKEN_BUCKETS,
+)
+MODEL_LOAD_DURATION = Histogram(
+    "model_load_duration_seconds", "Загрузка модели в реестр",
+    ["pair", "backend"], buckets=(1, 2.5, 5, 10, 30, 60, 120, 300),
+)
+DB_QUERIES = Histogram(
+    "db_queries_per_request", "SQL-запросов за HTTP-запрос",
+    ["route"], buckets=QUERY_BUCKETS,
+)
+DB_QUERY_TIME = Histogram(
+    "db_query_seconds_per_request", "Суммарное время SQL за HTTP-запрос",
+    ["route"], buckets=LATENCY_BUCKETS,
+)
+DB_QUERIES_TOTAL = Counter("db_queries_total", "Все SQL-запросы процесса")
+IN_FLIGHT = Gauge(
+    "translations_in_flight", "Переводы в обработке", multiprocess_mode="livesum",
+)
+
+
+@dataclass
+class _RequestStats:
+    queries: int = 0
+    query_seconds: float = 0.0
+
+
+_request_stats: ContextVar[Optional[_RequestStats]] = ContextVar("request_stats", default=None)
+
+
+@contextmanager
+def stage(name: str):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_DURATION.labels(name).observe(time.perf_counter() - started)
+
+
+def instrument_engine(engine) -> None:
+    """Счётчики SQL на запрос: события курсора пишут в объект из contextvar текущего запроса."""
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_started"].pop()
+        DB_QUERIES_TOTAL.inc()
+        stats = _request_stats.get()
+        if stats is not None:
+            stats.queries += 1
+            stats.query_seconds += elapsed
+
+
+class _PoolCollector:
+    """Состояние пулов соединений читается в момент scrape."""
+
+    def describe(self):
+        # без describe() регистрация вызывает collect(), а database.database
+        # в этот момент ещё импортирует этот модуль
+        return []
+
+    def collect(self):
+        from database.database import pool_stats
+
+        fields = ("size", "checked_out", "overflow", "utilisation", "checkouts", "avg_wait_seconds", "max_wait_seconds")
+        families = {
+            name: GaugeMetricFamily(f"db_pool_{name}", f"Пул соединений: {name}", labels=["engine"])
+            for name in fields
+        }
+        for engine_name, stats in pool_stats().items():
+            for name in fields:
+                families[name].add_metric([engine_name], stats[name])
+        return list(families.values())
+
+
+if "PROMETHEUS_MULTIPROC_DIR" not in os.environ:
+    REGISTRY.register(_PoolCollector())
+
+
+def render() -> tuple:
+    """Тело и content-type ответа /metrics."""
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        # gunicorn: сводим метрики всех воркеров
+        registry = CollectorRegistry()
+        MultiProcessCollector(registry)
+        registry.register(_PoolCollector())
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(), CONTENT_TYPE_LATEST
+
+
+class MetricsMiddleware:
+    """
+    ASGI-middleware: латентность по шаблону маршрута (не по сырому пути,
+    чтобы не раздувать кардинальность) и число/время SQL за запрос.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        status = 500
+        stats = _RequestStats()
+        token = _request_stats.set(stats)
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _request_stats.reset(token)
+            route = getattr(scope.get("route"), "path", "unmatched")
+            REQUEST_LATENCY.labels(scope["method"], route, str(status)).observe(time.perf_counter() - started)
+            DB_QUERIES.labels(route).observe(stats.queries)
+            DB_QUERY_TIME.labels(route).observe(stats.query_seconds)
@@ -0,0 +1,136 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, List, Tuple
+
+from database.config import get_settings
+from services.backends import backend_for
+from services.metrics import MODEL_LOAD_DURATION
+
+logger = logging.getLogger(__name__)
+
+LanguagePair = Tuple[str, str]
+
+SUPPORTED_MODELS: Dict[LanguagePair, str] = {
+    ("en", "fr"): "Helsinki-NLP/opus-mt-en-fr",
+    ("fr", "en"): "Helsinki-NLP/opus-mt-fr-en",
+}
+
+
+@dataclass
+class ModelEntry:
+    pipeline: Any
+    backend: str
+    size_bytes: int
+    load_seconds: float
+
+
+class ModelRegistry:
+    """
+    Кэш пайплайнов перевода на процесс.
+    Каждая языковая пара загружается один раз; при превышении бюджета памяти
+    выгружаются давно не использованные пары (LRU).
+    """
+
+    def __init__(self, models: Dict[LanguagePair, str], max_bytes: int):
+        self.models = models
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[LanguagePair, ModelEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._load_locks: Dict[LanguagePair, threading.Lock] = {pair: threading.Lock() for pair in models}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, pair: LanguagePair):
+        if pair not in self.models:
+            raise ValueError("Модель перевода не поддерживается")
+
+        entry = self._lookup(pair)
+        if entry is not None:
+            return entry.pipeline
+
+        # загрузка под отдельной блокировкой пары, чтобы не грузить одну модель дважды
+        with self._load_locks[pair]:
+            entry = self._lookup(pair, count=False)
+            if entry is not None:
+                return entry.pipeline
+
+            backend = backend_for(pair)
+            started = time.perf_counter()
+            translator = backend.load(self.models[pair])
+            entry = ModelEntry(
+                pipeline=translator,
+                backend=backend.name,
+                size_bytes=backend.size_bytes(translator),
+                load_seconds=time.perf_counter() - started,
+            )
+            MODEL_LOAD_DURATION.labels(f"{pair[0]}-{pair[1]}", backend.name).observe(entry.load_seconds)
+            logger.info(
+                "Loaded %s (%s) in %.2fs (%.1f MB)",
+                self.models[pair], backend.name, entry.load_seconds, entry.size_bytes / 2**20,
+            )
+
+            with self._lock:
+                self._entries[pair] = entry
+                self._evict_locked(keep=pair)
+            return translator
+
+    def _lookup(self, pair: LanguagePair, count: bool = True):
+        with self._lock:
+            entry = self._entries.get(pair)
+            if entry is not None:
+                self._entries.move_to_end(pair)
+                if count:
+                    self.hits += 1
+            elif count:
+                self.misses += 1
+            return entry
+
+    def _evict_locked(self, keep: LanguagePair) -> None:
+        while self.resident_bytes > self.max_bytes and len(self._entries) > 1:
+            pair = next(iter(self._entries))
+            if pair == keep:
+                break
+            evicted = self._entries.pop(pair)
+            self.evictions += 1
+            logger.info("Evicted %s (%.1f MB)", self.models[pair], evicted.size_bytes / 2**20)
+        if self.resident_bytes > self.max_bytes:
+            logger.warning("Model %s alone exceeds the memory budget", self.models[keep])
+
+    @property
+    def resident_bytes(self) -> int:
+        return sum(entry.size_bytes for entry in self._entries.values())
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "resident_bytes": self.resident_bytes,
+                "max_bytes": self.max_bytes,
+                "loaded": {
+                    f"{src}-{tgt}": {
+                        "backend": entry.backend,
+                        "size_bytes": entry.size_bytes,
+                        "load_seconds": round(entry.load_seconds, 3),
+                    }
+                    for (src, tgt), entry in self._entries.items()
+                },
+            }
+
+
+@lru_cache()
+def get_model_registry() -> ModelRegistry:
+    settings = get_settings()
+    return ModelRegistry(SUPPORTED_MODELS, max_bytes=settings.MODEL_CACHE_MAX_MB * 2**20)
+
+
+def translate_batch(pair: LanguagePair, texts: List[str]) -> List[str]:
+    translator = get_model_registry().get(pair)
+    results = translator(texts, batch_size=len(texts))
+    return [r["translation_text"] for r in results]
@@ -0,0 +1,69 @@
+"""
+Сверка оптимизированного бэкенда с fp32:
+    python -m services.parity en-fr int8 [файл с предложениями]
+"""
+import json
+import sys
+import time
+from difflib import SequenceMatcher
+from typing import List, Optional
+
+from services.backends import BACKENDS
+from services.model_registry import SUPPORTED_MODELS, LanguagePair
+
+SAMPLES = {
+    "en": [
+        "Hello, how are you?",
+        "The weather is nice today.",
+        "Please send me the invoice by Friday.",
+        "Machine translation quality depends on the training data.",
+        "I would like to book a table for two at eight o'clock.",
+    ],
+    "fr": [
+        "Bonjour, comment allez-vous ?",
+        "Il fait beau aujourd'hui.",
+        "Merci de m'envoyer la facture avant vendredi.",
+        "La qualité de la traduction automatique dépend des données.",
+        "Je voudrais réserver une table pour deux à huit heures.",
+    ],
+}
+
+
+def _translate(translator, texts: List[str]):
+    started = time.perf_counter()
+    outputs = [r["translation_text"] for r in translator(texts)]
+    return outputs, time.perf_counter() - started
+
+
+def check_parity(pair: LanguagePair, backend: str, texts: Optional[List[str]] = None) -> dict:
+    """Доля совпадающих переводов, средняя похожесть строк и время на тех же входах."""
+    model_name = SUPPORTED_MODELS[pair]
+    texts = texts or SAMPLES[pair[0]]
+    reference, reference_seconds = _translate(BACKENDS["torch"].load(model_name), texts)
+    candidate_translator = BACKENDS[backend].load(model_name)
+    _translate(candidate_translator, texts[:1])  # прогрев, чтобы не мерить инициализацию
+    candidate, candidate_seconds = _translate(candidate_translator, texts)
+
+    similarity = [SequenceMatcher(None, a, b).ratio() for a, b in zip(reference, candidate)]
+    return {
+        "pair": f"{pair[0]}-{pair[1]}",
+        "backend": backend,
+        "samples": len(texts),
+        "exact_match": round(sum(a == b for a, b in zip(reference, candidate)) / len(texts), 3),
+        "mean_similarity": round(sum(similarity) / len(similarity), 3),
+        "fp32_seconds": round(reference_seconds, 3),
+        "backend_seconds": round(candidate_seconds, 3),
+        "mismatches": [
+            {"input": text, "fp32": a, backend: b}
+            for text, a, b in zip(texts, reference, candidate) if a != b
+        ],
+    }
+
+
+if __name__ == "__main__":
+    src, _, tgt = sys.argv[1].partition("-")
+    texts = None
+    if len(sys.argv) > 3:
+        with open(sys.argv[3], encoding="utf-8") as f:
+            texts = [line.strip() for line in f if line.strip()]
+    print(json.dumps(check_parity((src, tgt), sys.argv[2], texts), ensure_ascii=False, indent=2))
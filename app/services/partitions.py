@@ -0,0 +1,96 @@
+import re
+from datetime import date, datetime, time
+from typing import List, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from utils.clock import UtcClock
+
+PARTITIONED_TABLES = ("translations", "transactions")
+_PARTITION_RE = re.compile(r"^(?P<table>\w+)_y(?P<year>\d{4})m(?P<month>\d{2})$")
+# воркеры стартуют одновременно: DDL партиций выполняется под общей блокировкой
+_DDL_LOCK_ID = 7_245_001
+
+
+def month_start(value: datetime | date, shift: int = 0) -> date:
+    """Первое число месяца value, сдвинутого на shift месяцев."""
+    index = value.year * 12 + value.month - 1 + shift
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_y{month.year:04d}m{month.month:02d}"
+
+
+async def create_month_partition(conn: AsyncConnection, table: str, month: date) -> None:
+    """
+    Партиция месяца. Строки этого месяца, уже попавшие в DEFAULT (например,
+    перенесённые из старой таблицы), переезжают в неё: иначе Postgres не даст
+    создать партицию с пересекающимся диапазоном.
+    """
+    name = partition_name(table, month)
+    if (await conn.execute(text("SELECT to_regclass(:name)"), {"name": name})).scalar() is not None:
+        return
+    bounds = {"start": datetime.combine(month, time.min), "end": datetime.combine(month_start(month, 1), time.min)}
+    in_range = "timestamp >= :start AND timestamp < :end"
+    in_default = (await conn.execute(
+        text(f"SELECT EXISTS (SELECT 1 FROM {table}_default WHERE {in_range})"), bounds
+    )).scalar()
+    create = (
+        f"CREATE TABLE {name} PARTITION OF {table} "
+        f"FOR VALUES FROM ('{month.isoformat()}') TO ('{month_start(month, 1).isoformat()}')"
+    )
+    if not in_default:
+        await conn.execute(text(create))
+        return
+    await conn.execute(text(f"ALTER TABLE {table} DETACH PARTITION {table}_default"))
+    await conn.execute(text(create))
+    await conn.execute(text(f"INSERT INTO {table} SELECT * FROM {table}_default WHERE {in_range}"), bounds)
+    await conn.execute(text(f"DELETE FROM {table}_default WHERE {in_range}"), bounds)
+    await conn.execute(text(f"ALTER TABLE {table} ATTACH PARTITION {table}_default DEFAULT"))
+
+
+async def split_default(conn: AsyncConnection, table: str, before: date) -> None:
+    """Разносит строки DEFAULT старше before по помесячным партициям, чтобы их можно было архивировать."""
+    await conn.execute(text("SELECT pg_advisory_xact_lock(:id)"), {"id": _DDL_LOCK_ID})
+    rows = await conn.execute(
+        text(f"SELECT DISTINCT date_trunc('month', timestamp) FROM {table}_default WHERE timestamp < :before"),
+        {"before": datetime.combine(before, time.min)},
+    )
+    for (month,) in rows.all():
+        await create_month_partition(conn, table, month_start(month))
+
+
+async def ensure_partitions(conn: AsyncConnection, months_ahead: int) -> None:
+    """
+    Партиции с текущего месяца (UTC) на months_ahead вперёд и DEFAULT для строк
+    вне диапазонов. Только для PostgreSQL, на других СУБД таблицы обычные.
+    """
+    if conn.dialect.name != "postgresql":
+        return
+    await conn.execute(text("SELECT pg_advisory_xact_lock(:id)"), {"id": _DDL_LOCK_ID})
+    today = UtcClock.now()
+    for table in PARTITIONED_TABLES:
+        await conn.execute(text(f"CREATE TABLE IF NOT EXISTS {table}_default PARTITION OF {table} DEFAULT"))
+        for shift in range(months_ahead + 1):
+            await create_month_partition(conn, table, month_start(today, shift))
+
+
+async def list_partitions(conn: AsyncConnection, table: str) -> List[Tuple[str, date]]:
+    """Помесячные партиции таблицы: (имя, первое число месяца), от старых к новым."""
+    rows = await conn.execute(
+        text(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "JOIN pg_class p ON p.oid = i.inhparent "
+            "WHERE p.relname = :table"
+        ),
+        {"table": table},
+    )
+    partitions = []
+    for (name,) in rows:
+        match = _PARTITION_RE.match(name)
+        if match and match["table"] == table:
+            partitions.append((name, date(int(match["year"]), int(match["month"]), 1)))
+    return sorted(partitions, key=lambda p: p[1])
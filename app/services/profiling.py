@@ -0,0 +1,165 @@
+import asyncio
+import json
+import logging
+import os
+import random
+import re
+import time
+import uuid
+from datetime import datetime
+from functools import lru_cache
+from typing import List, Optional
+
+from database.config import get_settings
+from database.database import read_session
+from services.user_cache import get_user_cache
+from utils.tokens import SessionToken
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = b"x-profile"
+_PROFILE_ID = re.compile(r"^[0-9T]+-[0-9a-f]{32}$")
+
+
+class ProfileStore:
+    """
+    Кольцевой буфер профилей на диске: <id>.html (отчёт pyinstrument) и <id>.json (метаданные).
+    При превышении max_files удаляются самые старые.
+    """
+
+    def __init__(self, directory: str, max_files: int):
+        self.directory = directory
+        self.max_files = max_files
+
+    def save(self, meta: dict, html: str) -> str:
+        os.makedirs(self.directory, exist_ok=True)
+        profile_id = f"{datetime.utcnow():%Y%m%dT%H%M%S}-{uuid.uuid4().hex}"
+        with open(self._path(profile_id, "html"), "w", encoding="utf-8") as f:
+            f.write(html)
+        # метаданные пишутся последними: по ним строится список
+        with open(self._path(profile_id, "json"), "w", encoding="utf-8") as f:
+            json.dump({"id": profile_id, **meta}, f, ensure_ascii=False)
+        self._prune()
+        return profile_id
+
+    def list(self) -> List[dict]:
+        profiles = []
+        for profile_id in self._ids():
+            try:
+                with open(self._path(profile_id, "json"), encoding="utf-8") as f:
+                    profiles.append(json.load(f))
+            except (FileNotFoundError, ValueError):
+                continue  # удалён другим воркером между listdir и open
+        return profiles
+
+    def html_path(self, profile_id: str) -> Optional[str]:
+        if not _PROFILE_ID.match(profile_id):
+            return None
+        path = self._path(profile_id, "html")
+        return path if os.path.exists(path) else None
+
+    def _ids(self) -> List[str]:
+        if not os.path.isdir(self.directory):
+            return []
+        # id начинается с времени: сортировка по имени = по времени, новые первыми
+        return sorted(
+            (name[:-5] for name in os.listdir(self.directory) if name.endswith(".json")),
+            reverse=True,
+        )
+
+    def _prune(self) -> None:
+        for profile_id in self._ids()[self.max_files:]:
+            for ext in ("json", "html"):
+                try:
+                    os.remove(self._path(profile_id, ext))
+                except FileNotFoundError:
+                    pass
+
+    def _path(self, profile_id: str, ext: str) -> str:
+        return os.path.join(self.directory, f"{profile_id}.{ext}")
+
+
+@lru_cache()
+def get_profile_store() -> ProfileStore:
+    settings = get_settings()
+    return ProfileStore(settings.PROFILE_DIR, settings.PROFILE_MAX_FILES)
+
+
+async def _is_admin_request(headers: dict) -> bool:
+    # только подписанный Bearer-токен: X-User-Id подделывается любым клиентом
+    scheme, _, token = headers.get(b"authorization", b"").decode().partition(" ")
+    user_id = SessionToken.verify(token) if scheme.lower() == "bearer" else None
+    if user_id is None:
+        return False
+    async with read_session() as db:
+        cached = await get_user_cache().get(db, user_id)
+    return bool(cached and cached.is_admin)
+
+
+class ProfilingMiddleware:
+    """
+    Wall-clock профиль всего запроса (pyinstrument, async_mode): роутер, сервисы,
+    вызовы SQLAlchemy. Инференс идёт в пуле инференса и в профиле виден как ожидание.
+    Включается заголовком X-Profile: 1 (только для админов с Bearer-токеном) или выборочно с
+    вероятностью PROFILE_SAMPLE_RATE для путей с префиксом PROFILE_PATH_PREFIX.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        settings = get_settings()
+        self.sample_rate = settings.PROFILE_SAMPLE_RATE
+        self.path_prefix = settings.PROFILE_PATH_PREFIX
+        self.min_duration = settings.PROFILE_MIN_DURATION_MS / 1000
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            Profiler = None
+            if self.sample_rate:
+                logger.warning("PROFILE_SAMPLE_RATE is set but pyinstrument is not installed")
+        self.profiler_class = Profiler
+
+    async def _trigger(self, scope) -> Optional[str]:
+        headers = dict(scope["headers"])
+        if headers.get(PROFILE_HEADER) in (b"1", b"true") and await _is_admin_request(headers):
+            return "header"
+        if self.sample_rate and scope["path"].startswith(self.path_prefix) and random.random() < self.sample_rate:
+            return "sample"
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or self.profiler_class is None:
+            return await self.app(scope, receive, send)
+        trigger = await self._trigger(scope)
+        if trigger is None:
+            return await self.app(scope, receive, send)
+
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        profiler = self.profiler_class(async_mode="enabled")
+        started = time.perf_counter()
+        profiler.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            profiler.stop()
+            duration = time.perf_counter() - started
+            # выборочные профили быстрых запросов не занимают место в буфере
+            if trigger == "header" or duration >= self.min_duration:
+                meta = {
+                    "timestamp": datetime.utcnow().isoformat(),
+                    "method": scope["method"],
+                    "path": scope["path"],
+                    "status": status,
+                    "duration_ms": round(duration * 1000, 1),
+                    "trigger": trigger,
+                }
+                try:
+                    await asyncio.to_thread(get_profile_store().save, meta, profiler.output_html())
+                except OSError:
+                    logger.exception("Failed to save profile")
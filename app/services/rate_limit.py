@@ -0,0 +1,148 @@
+import heapq
+import itertools
+import time
+from collections import OrderedDict
+from contextvars import ContextVar
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+from database.config import get_settings
+
+
+@dataclass
+class TierLimits:
+    per_minute: float
+    burst: int
+    weight: float
+
+
+def parse_tiers(value: str) -> Dict[str, TierLimits]:
+    """"free:30:10:1,pro:300:50:4" -> тариф: запросов в минуту, burst, вес в очереди инференса."""
+    tiers = {}
+    for item in filter(None, (part.strip() for part in value.split(","))):
+        name, per_minute, burst, weight = item.split(":")
+        tiers[name] = TierLimits(float(per_minute), int(burst), float(weight))
+    return tiers
+
+
+@lru_cache()
+def get_tiers() -> Dict[str, TierLimits]:
+    return parse_tiers(get_settings().RATE_LIMIT_TIERS)
+
+
+def tier_limits(tier: Optional[str]) -> TierLimits:
+    tiers = get_tiers()
+    return tiers.get(tier) or tiers[get_settings().DEFAULT_TIER]
+
+
+@dataclass
+class RateDecision:
+    allowed: bool
+    limit: int
+    remaining: int
+    retry_after: float
+
+
+class RateLimiter:
+    """
+    Token bucket на пользователя: ёмкость burst, пополнение per_minute / 60 в секунду.
+    Бакеты в памяти процесса (при нескольких воркерах лимит действует на каждый),
+    число бакетов ограничено max_users, вытесняется давно не активный пользователь.
+    """
+
+    def __init__(self, max_users: int):
+        self.max_users = max_users
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()  # user_id -> (tokens, updated_at)
+        self.allowed = 0
+        self.throttled = 0
+
+    def check(self, user_id: str, limits: TierLimits, cost: int = 1) -> RateDecision:
+        now = time.monotonic()
+        tokens, updated_at = self._buckets.get(user_id, (float(limits.burst), now))
+        rate = limits.per_minute / 60
+        tokens = min(float(limits.burst), tokens + (now - updated_at) * rate)
+
+        allowed = tokens >= cost
+        if allowed:
+            tokens -= cost
+            self.allowed += 1
+        else:
+            self.throttled += 1
+        self._buckets[user_id] = (tokens, now)
+        self._buckets.move_to_end(user_id)
+        while len(self._buckets) > self.max_users:
+            self._buckets.popitem(last=False)
+
+        # тариф с нулевой скоростью: повторить не раньше чем через минуту
+        retry_after = 0.0 if allowed else ((cost - tokens) / rate if rate else 60.0)
+        return RateDecision(allowed, limits.burst, int(tokens), retry_after)
+
+    def stats(self) -> dict:
+        return {"users": len(self._buckets), "allowed": self.allowed, "throttled": self.throttled}
+
+
+@lru_cache()
+def get_rate_limiter() -> RateLimiter:
+    return RateLimiter(max_users=get_settings().RATE_LIMIT_MAX_USERS)
+
+
+@dataclass
+class SchedulingInfo:
+    """Кто ставит работу в очередь инференса; позиция заполняется батчером."""
+
+    user_id: Optional[str]
+    weight: float
+    queue_position: Optional[int] = None
+
+
+_scheduling: ContextVar[Optional[SchedulingInfo]] = ContextVar("scheduling", default=None)
+
+
+def bind_scheduling(user_id: str, tier: Optional[str]) -> SchedulingInfo:
+    """Привязывает пользователя к текущему запросу: задачи внутри него наследуют контекст."""
+    info = SchedulingInfo(user_id=user_id, weight=tier_limits(tier).weight)
+    _scheduling.set(info)
+    return info
+
+
+def current_scheduling() -> Optional[SchedulingInfo]:
+    return _scheduling.get()
+
+
+class FairQueue:
+    """
+    Взвешенная справедливая очередь (self-clocked fair queuing): у каждого
+    пользователя свой поток, элемент получает метку окончания
+    max(V, последняя метка потока) + cost / weight, обслуживается минимальная метка.
+    Поток с большим числом запросов не вытесняет остальных, а чередуется с ними.
+    """
+
+    def __init__(self):
+        self._heap: List[Tuple[float, int, Optional[str], Any]] = []
+        self._last_finish: Dict[Optional[str], float] = {}
+        self._virtual_time = 0.0
+        self._seq = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def push(self, item: Any, flow: Optional[str], weight: float, cost: float) -> int:
+        """Возвращает число элементов других потоков, которые будут обслужены раньше."""
+        start = max(self._virtual_time, self._last_finish.get(flow, 0.0))
+        finish = start + cost / weight
+        self._last_finish[flow] = finish
+        position = sum(1 for tag, _, other, _ in self._heap if tag <= finish and other != flow)
+        heapq.heappush(self._heap, (finish, next(self._seq), flow, item))
+        return position
+
+    def peek(self) -> Any:
+        return self._heap[0][3]
+
+    def pop(self) -> Any:
+        finish, _, _, item = heapq.heappop(self._heap)
+        self._virtual_time = finish
+        if len(self._last_finish) > 2 * len(self._heap) + 100:
+            # метки не новее V ничего не меняют: max(V, метка) = V
+            self._last_finish = {f: t for f, t in self._last_finish.items() if t > finish}
+        return item
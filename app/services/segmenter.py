@@ -0,0 +1,91 @@
+import asyncio
+import re
+from typing import Awaitable, Callable, List, Tuple
+
+from database.config import get_settings
+from services.translation_cache import document_hash, get_translation_cache
+
+# граница предложения (знак конца + пробелы) или перевод строки
+_BOUNDARY_RE = re.compile(r"((?<=[.!?…])\s+|\s*\n\s*)")
+_EDGES_RE = re.compile(r"^(\s*)(.*?)(\s*)$", re.S)
+
+Piece = Tuple[str, bool]  # (текст, нужно ли переводить)
+
+
+def split_text(text: str, max_chars: int) -> List[Piece]:
+    """
+    Делит текст на предложения/абзацы. Пробелы и переводы строк остаются
+    отдельными кусками, чтобы собрать ответ с исходным форматированием.
+    """
+    pieces: List[Piece] = []
+    for i, part in enumerate(_BOUNDARY_RE.split(text)):
+        if not part:
+            continue
+        if i % 2:
+            pieces.append((part, False))
+            continue
+        lead, core, trail = _EDGES_RE.match(part).groups()
+        if lead:
+            pieces.append((lead, False))
+        for chunk in _split_long(core, max_chars):
+            pieces.append(chunk)
+        if trail:
+            pieces.append((trail, False))
+    return pieces
+
+
+def _split_long(sentence: str, max_chars: int) -> List[Piece]:
+    # слишком длинные предложения режем по пробелам, иначе модель их обрежет
+    if not sentence:
+        return []
+    if len(sentence) <= max_chars:
+        return [(sentence, True)]
+    pieces: List[Piece] = []
+    while len(sentence) > max_chars:
+        cut = sentence.rfind(" ", 0, max_chars)
+        if cut <= 0:
+            cut = max_chars
+        pieces.append((sentence[:cut], True))
+        pieces.append((" ", False))
+        sentence = sentence[cut:].lstrip()
+    if sentence:
+        pieces.append((sentence, True))
+    return pieces
+
+
+async def translate_segmented(
+    text: str,
+    source_lang: str,
+    target_lang: str,
+    translate: Callable[[str], Awaitable[str]],
+) -> str:
+    """
+    Переводит текст по сегментам: каждый сегмент кэшируется отдельно, а
+    промахи отправляются в модель одновременно и попадают в один батч.
+    """
+    cache = get_translation_cache()
+    pieces = split_text(text, get_settings().SEGMENT_MAX_CHARS)
+    segments = [value for value, translatable in pieces if translatable]
+    if not segments:
+        return text
+    if len(segments) == 1:
+        # короткий текст: работает и постоянный уровень кэша
+        output = await cache.get_or_translate(
+            source_lang, target_lang, segments[0], lambda: translate(segments[0]), persistent=True
+        )
+        return "".join(output if translatable else value for value, translatable in pieces)
+
+    whole_key = (source_lang, target_lang, document_hash(text))
+    output = cache.get(whole_key)
+    if output is not None:
+        cache.hits += 1
+        return output
+
+    outputs = await asyncio.gather(*(
+        cache.get_or_translate(source_lang, target_lang, segment, lambda s=segment: translate(s))
+        for segment in segments
+    ))
+    translated = iter(outputs)
+    output = "".join(next(translated) if translatable else value for value, translatable in pieces)
+    cache.put(whole_key, output)
+    return output
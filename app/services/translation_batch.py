@@ -0,0 +1,74 @@
+import asyncio
+from datetime import datetime
+from typing import List
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from services.billing import refund, reserve, settle, translation_row
+from services.metrics import IN_FLIGHT, stage
+from services.segmenter import translate_segmented
+from services.translation_request import Model
+
+
+async def process_batch_request(db: AsyncSession, user_id: str, items: List, cost: int = 1) -> dict:
+    """
+    Пакетный перевод:
+    - проверяет элементы, ошибки возвращаются по каждому элементу отдельно
+    - резервирует стоимость всех корректных элементов одним запросом
+    - переводит всё одновременно (батчер собирает общие forward-проходы)
+    - bulk insert истории, одно списание и возврат за неудачные элементы одним commit
+    """
+    model = Model()
+    results: List[dict] = [{"index": i} for i in range(len(items))]
+
+    valid = []
+    for i, item in enumerate(items):
+        if not item.input_text or not item.input_text.strip():
+            results[i]["error"] = "Пустой текст"
+        elif (item.source_lang, item.target_lang) not in Model.SUPPORTED_MODELS:
+            results[i]["error"] = "Модель перевода не поддерживается"
+        else:
+            valid.append(i)
+
+    with IN_FLIGHT.track_inprogress():
+        reserved = cost * len(valid)
+        if reserved:
+            with stage("reserve"):
+                await reserve(db, user_id, reserved)
+
+        try:
+            with stage("inference"):
+                outputs = await asyncio.gather(
+                    *(
+                        translate_segmented(
+                            items[i].input_text,
+                            items[i].source_lang,
+                            items[i].target_lang,
+                            lambda segment, it=items[i]: model.atranslate(segment, it.source_lang, it.target_lang),
+                        )
+                        for i in valid
+                    ),
+                    return_exceptions=True,
+                )
+        except BaseException:
+            await asyncio.shield(refund(user_id, reserved))
+            raise
+
+        rows = []
+        for i, output in zip(valid, outputs):
+            if isinstance(output, Exception):
+                results[i]["error"] = str(output)
+                continue
+            results[i]["output_text"] = output
+            rows.append(translation_row(
+                user_id, items[i].input_text, output, items[i].source_lang, items[i].target_lang, cost
+            ))
+
+        with stage("settle"):
+            total = await settle(db, user_id, reserved, rows) if reserved else 0
+
+    return {
+        "items": results,
+        "cost": total,
+        "timestamp": datetime.utcnow().isoformat(),
+    }
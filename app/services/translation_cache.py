@@ -0,0 +1,162 @@
+import asyncio
+import hashlib
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from sqlalchemy import select
+
+from database.config import get_settings
+from database.database import async_session
+from models.translation import Translation
+from services.translation_memory import get_translation_memory
+
+CacheKey = Tuple[str, str, str]
+
+
+def normalize_text(text: str) -> str:
+    return " ".join(text.split())
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(normalize_text(text).encode()).hexdigest()
+
+
+def document_hash(text: str) -> str:
+    # ключ перевода целого многосегментного текста: по сырому тексту, потому что
+    # перевод собирается с исходными пробелами и переводами строк
+    return "doc:" + hashlib.sha256(text.encode()).hexdigest()
+
+
+class TranslationCache:
+    """
+    Кэш результатов перевода по (source_lang, target_lang, хэш нормализованного текста).
+    Первый уровень: LRU с TTL в памяти процесса, второй (опционально): таблица translations.
+    Одинаковые конкурентные запросы ждут один общий инференс.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: int, persistent: bool):
+        self.max_entries = max_entries
+        self.ttl = ttl_seconds
+        self.persistent = persistent
+        self._entries: "OrderedDict[CacheKey, Tuple[float, str]]" = OrderedDict()
+        self._inflight: Dict[CacheKey, asyncio.Task] = {}
+        self._waiters: Dict[asyncio.Task, int] = {}
+        self.hits = 0
+        self.persistent_hits = 0
+        self.coalesced = 0
+        self.misses = 0
+        self.cancelled = 0
+
+    def get(self, key: CacheKey) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, output = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return output
+
+    def put(self, key: CacheKey, output: str) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl, output)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def get_or_translate(
+        self,
+        source_lang: str,
+        target_lang: str,
+        text: str,
+        translate: Callable[[], Awaitable[str]],
+        persistent: bool = False,
+    ) -> str:
+        key = (source_lang, target_lang, text_hash(text))
+
+        output = self.get(key)
+        if output is not None:
+            self.hits += 1
+            return output
+
+        if key not in self._inflight and self.persistent and persistent:
+            output = await self._lookup_db(key)
+            if output is not None:
+                self.persistent_hits += 1
+                self.put(key, output)
+                return output
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            task = asyncio.ensure_future(self._translate(key, text, translate))
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._forget(key, t))
+        # shield: отмена одного из ожидающих не должна отменять общий инференс,
+        # но когда уходит последний, инференс отменяется (батчер пропустит сегмент)
+        self._waiters[task] = self._waiters.get(task, 0) + 1
+        try:
+            return await asyncio.shield(task)
+        finally:
+            self._waiters[task] -= 1
+            if not self._waiters[task]:
+                del self._waiters[task]
+                if not task.done():
+                    self._forget(key, task)
+                    task.cancel()
+                    self.cancelled += 1
+
+    def _forget(self, key: CacheKey, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+
+    async def _translate(self, key: CacheKey, text: str, translate: Callable[[], Awaitable[str]]) -> str:
+        # перед инференсом: почти совпадающий текст из памяти переводов
+        memory = get_translation_memory()
+        output = memory.lookup(key[0], key[1], text) if memory is not None else None
+        if output is None:
+            output = await translate()
+        self.put(key, output)
+        return output
+
+    async def _lookup_db(self, key: CacheKey) -> Optional[str]:
+        # своя короткая сессия: соединение не должно висеть на время инференса
+        source_lang, target_lang, input_hash = key
+        async with async_session() as db:
+            res = await db.execute(
+                select(Translation.output_text)
+                .where(
+                    Translation.source_lang == source_lang,
+                    Translation.target_lang == target_lang,
+                    Translation.input_hash == input_hash,
+                )
+                .order_by(Translation.timestamp.desc())
+                .limit(1)
+            )
+            return res.scalar_one_or_none()
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "persistent_hits": self.persistent_hits,
+            "coalesced": self.coalesced,
+            "misses": self.misses,
+            "in_flight": len(self._inflight),
+            "cancelled": self.cancelled,
+        }
+
+
+@lru_cache()
+def get_translation_cache() -> TranslationCache:
+    settings = get_settings()
+    return TranslationCache(
+        max_entries=settings.RESULT_CACHE_MAX_ENTRIES,
+        ttl_seconds=settings.RESULT_CACHE_TTL_SECONDS,
+        persistent=settings.RESULT_CACHE_PERSISTENT,
+    )
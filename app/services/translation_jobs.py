@@ -0,0 +1,187 @@
+import asyncio
+import logging
+from datetime import timedelta
+from typing import Optional
+
+from sqlalchemy import and_, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database.config import get_settings
+from database.database import async_session
+from models.job import TranslationJob
+from models.user import User
+from services.billing import refund
+from services.broker import InMemoryBroker, get_broker
+from services.inference_executor import InferenceOverloaded
+from services.rate_limit import bind_scheduling
+from services.translation_request import Model, process_translation_request
+from services.user_cache import get_user_cache
+from utils.clock import UtcClock
+
+logger = logging.getLogger(__name__)
+
+OVERLOAD_RETRY_SECONDS = 1.0
+JOB_COST = 1  # как в process_translation_request
+
+
+async def enqueue_job(db: AsyncSession, user_id: str, data) -> TranslationJob:
+    """Сохраняет задачу со статусом queued и публикует её id в брокер."""
+    if (data.source_lang, data.target_lang) not in Model.SUPPORTED_MODELS:
+        raise ValueError("Модель перевода не поддерживается")
+    if (await db.execute(select(User.id).where(User.id == user_id))).scalar_one_or_none() is None:
+        raise ValueError("User not found")
+
+    job = TranslationJob(
+        user_id=user_id,
+        input_text=data.input_text,
+        source_lang=data.source_lang,
+        target_lang=data.target_lang,
+    )
+    db.add(job)
+    await db.commit()
+
+    await get_broker().publish({"job_id": job.id})
+    return job
+
+
+async def get_job(db: AsyncSession, user_id: str, job_id: str) -> Optional[TranslationJob]:
+    res = await db.execute(
+        select(TranslationJob).where(TranslationJob.id == job_id, TranslationJob.user_id == user_id)
+    )
+    return res.scalar_one_or_none()
+
+
+async def handle_job(message: dict) -> None:
+    """
+    Обработчик воркера:
+    - атомарно переводит задачу из queued в running (захват с арендой claimed_at);
+      задачу в running с истёкшей арендой воркер, видимо, бросил, и её забирает другой
+    - выполняет перевод и списание через process_translation_request
+    - сохраняет результат или ошибку в задаче
+    Резерв отмечается в задаче в одной транзакции с резервом, результат — в одной
+    транзакции со списанием, поэтому повторная доставка не списывает дважды:
+    завершённая задача пропускается, а незавершённый резерв перед повтором возвращается.
+    """
+    job_id = message["job_id"]
+    settings = get_settings()
+    async with async_session() as db:
+        now = UtcClock.now()
+        job = (await db.execute(
+            update(TranslationJob)
+            .where(
+                TranslationJob.id == job_id,
+                or_(
+                    TranslationJob.status == "queued",
+                    and_(
+                        TranslationJob.status == "running",
+                        TranslationJob.claimed_at < now - timedelta(seconds=settings.JOBS_LEASE_SECONDS),
+                    ),
+                ),
+            )
+            .values(status="running", claimed_at=now, updated_at=now)
+            .returning(TranslationJob)
+        )).scalar_one_or_none()
+        await db.commit()
+        if job is None:
+            logger.info("Job %s is not queued (missing, finished or leased), skipping", job_id)
+            return
+        user_id = job.user_id
+        stale_reserve = job.reserved
+        data = {
+            "input_text": job.input_text,
+            "source_lang": job.source_lang,
+            "target_lang": job.target_lang,
+        }
+        if stale_reserve:
+            # прошлый воркер упал между резервом и расчётом
+            logger.warning("Job %s lease expired with %s reserved, refunding and retrying", job_id, stale_reserve)
+            await db.execute(update(TranslationJob).where(TranslationJob.id == job_id).values(reserved=0))
+            await refund(user_id, stale_reserve, db)
+        # задачи из очереди делят инференс с онлайн-запросами на общих правах
+        cached = await get_user_cache().get(db, user_id)
+        bind_scheduling(user_id, cached.tier if cached else None)
+
+        async def on_settle(settle_db: AsyncSession, output_text: str) -> None:
+            await settle_db.execute(
+                update(TranslationJob)
+                .where(TranslationJob.id == job_id)
+                .values(status="done", output_text=output_text, reserved=0, updated_at=UtcClock.now())
+            )
+
+        while True:
+            # фиксируется вместе с резервом: reserve делает commit этой сессии
+            await db.execute(
+                update(TranslationJob)
+                .where(TranslationJob.id == job_id)
+                .values(reserved=JOB_COST, claimed_at=UtcClock.now())
+            )
+            try:
+                await process_translation_request(db, user_id, data, on_settle=on_settle)
+                return
+            except InferenceOverloaded:
+                # локальный пул инференса занят, задача остаётся в работе
+                await db.rollback()
+                await asyncio.sleep(OVERLOAD_RETRY_SECONDS)
+            except Exception as exc:
+                # резерв уже возвращён в process (или не был сделан)
+                await db.rollback()
+                await _set_status(db, job_id, status="failed", error=str(exc), reserved=0)
+                return
+
+
+async def _set_status(db: AsyncSession, job_id: str, **values) -> None:
+    await db.execute(
+        update(TranslationJob)
+        .where(TranslationJob.id == job_id)
+        .values(updated_at=UtcClock.now(), **values)
+    )
+    await db.commit()
+
+
+async def requeue_stale_jobs() -> int:
+    """
+    Повторно публикует задачи, которые дольше аренды стоят в queued или running:
+    сообщение о них могло пропасть вместе с упавшим процессом. Лишние копии
+    безопасны — задачу забирает только один захват.
+    """
+    deadline = UtcClock.now() - timedelta(seconds=get_settings().JOBS_LEASE_SECONDS)
+    async with async_session() as db:
+        job_ids = (await db.execute(
+            select(TranslationJob.id).where(or_(
+                and_(TranslationJob.status == "queued", TranslationJob.created_at < deadline),
+                and_(TranslationJob.status == "running", TranslationJob.claimed_at < deadline),
+            ))
+        )).scalars().all()
+    broker = get_broker()
+    for job_id in job_ids:
+        await broker.publish({"job_id": job_id})
+    if job_ids:
+        logger.warning("Requeued %s stale jobs", len(job_ids))
+    return len(job_ids)
+
+
+async def job_lease_loop() -> None:
+    """Раз в половину JOBS_LEASE_SECONDS возвращает брошенные задачи в очередь."""
+    interval = get_settings().JOBS_LEASE_SECONDS / 2
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await requeue_stale_jobs()
+        except Exception:
+            logger.exception("Stale job requeue failed")
+
+
+def start_inprocess_consumer(concurrency: int) -> Optional[asyncio.Task]:
+    """Без внешнего брокера задачи обрабатываются в самом веб-процессе."""
+    broker = get_broker()
+    if not isinstance(broker, InMemoryBroker):
+        return None
+
+    async def consume():
+        lease = asyncio.create_task(job_lease_loop())
+        try:
+            await broker.consume(handle_job, concurrency=concurrency)
+        finally:
+            lease.cancel()
+
+    return asyncio.create_task(consume())
@@ -0,0 +1,216 @@
+import asyncio
+import logging
+import re
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+from sqlalchemy import select
+
+from database.config import get_settings
+from database.database import read_session
+from models.translation import Translation
+
+logger = logging.getLogger(__name__)
+
+LanguagePair = Tuple[str, str]
+
+_NUMBER_RE = re.compile(r"\d+(?:[.,]\d+)*")
+_PRIME = (1 << 31) - 1
+
+
+def _masked(text: str) -> str:
+    # регистр, лишние пробелы и конкретные числа на похожесть не влияют
+    return _NUMBER_RE.sub("#", " ".join(text.split()).lower())
+
+
+def _shingles(masked: str) -> Set[str]:
+    padded = f" {masked} "
+    if len(padded) < 3:
+        return {padded}
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _jaccard(a: Set[str], b: Set[str]) -> float:
+    return len(a & b) / len(a | b) if a or b else 1.0
+
+
+def _substitute_numbers(output: str, stored: List[str], query: List[str]) -> Optional[str]:
+    """
+    Переносит числа запроса в сохранённый перевод. None, если числа не удаётся
+    однозначно сопоставить (тогда перевод делает модель).
+    """
+    if stored == query:
+        return output
+    if len(stored) != len(query):
+        return None
+    mapping: Dict[str, str] = {}
+    for old, new in zip(stored, query):
+        if mapping.setdefault(old, new) != new:
+            return None
+    # в переводе должны стоять ровно те же числа, что в исходнике
+    if sorted(_NUMBER_RE.findall(output)) != sorted(stored):
+        return None
+    return _NUMBER_RE.sub(lambda m: mapping[m.group(0)], output)
+
+
+@dataclass
+class _Entry:
+    pair: LanguagePair
+    masked: str
+    numbers: List[str]
+    output: str
+    bands: List[bytes]
+
+
+class TranslationMemory:
+    """
+    Нечёткая память переводов: MinHash по символьным 3-граммам нормализованного
+    текста (числа заменены плейсхолдером) и LSH-бакеты для поиска кандидатов.
+    Кандидаты проверяются точным коэффициентом Жаккара; при похожести не ниже
+    threshold возвращается сохранённый перевод с подставленными числами.
+    Размер ограничен max_entries (вытесняются самые старые записи).
+    """
+
+    def __init__(self, threshold: float, max_entries: int, max_chars: int, num_perm: int, bands: int):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.max_chars = max_chars
+        self.bands = bands
+        self.rows_per_band = num_perm // bands
+        rng = np.random.default_rng(1)
+        self._a = rng.integers(1, _PRIME, size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, _PRIME, size=num_perm, dtype=np.uint64)
+        self._entries: "OrderedDict[int, _Entry]" = OrderedDict()
+        self._by_text: Dict[Tuple[LanguagePair, str], int] = {}
+        self._buckets: Dict[Tuple[LanguagePair, bytes], Set[int]] = {}
+        self._next_id = 0
+        self.hits = 0
+        self.misses = 0
+        self.rejected = 0
+
+    def _bands(self, shingles: Set[str]) -> List[bytes]:
+        hashes = np.fromiter((zlib.crc32(s.encode()) for s in shingles), dtype=np.uint64, count=len(shingles))
+        signature = ((self._a[:, None] * hashes[None, :] + self._b[:, None]) % _PRIME).min(axis=1)
+        step = self.rows_per_band
+        return [bytes([i]) + signature[i * step:(i + 1) * step].tobytes() for i in range(self.bands)]
+
+    def add(self, source_lang: str, target_lang: str, text: str, output: str, replace: bool = True) -> None:
+        if not text.strip() or len(text) > self.max_chars:
+            return
+        pair = (source_lang, target_lang)
+        masked = _masked(text)
+        old = self._by_text.get((pair, masked))
+        if old is not None:
+            if not replace:
+                return
+            self._remove(old)
+
+        entry = _Entry(pair, masked, _NUMBER_RE.findall(text), output, self._bands(_shingles(masked)))
+        entry_id = self._next_id
+        self._next_id += 1
+        self._entries[entry_id] = entry
+        self._by_text[(pair, masked)] = entry_id
+        for band in entry.bands:
+            self._buckets.setdefault((pair, band), set()).add(entry_id)
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+
+    def _remove(self, entry_id: int) -> None:
+        entry = self._entries.pop(entry_id)
+        if self._by_text.get((entry.pair, entry.masked)) == entry_id:
+            del self._by_text[(entry.pair, entry.masked)]
+        for band in entry.bands:
+            bucket = self._buckets.get((entry.pair, band))
+            if bucket is not None:
+                bucket.discard(entry_id)
+                if not bucket:
+                    del self._buckets[(entry.pair, band)]
+
+    def lookup(self, source_lang: str, target_lang: str, text: str) -> Optional[str]:
+        if not self._entries or len(text) > self.max_chars:
+            return None
+        pair = (source_lang, target_lang)
+        masked = _masked(text)
+        numbers = _NUMBER_RE.findall(text)
+
+        exact = self._by_text.get((pair, masked))
+        candidates = {exact} if exact is not None else set()
+        shingles = _shingles(masked)
+        if exact is None:
+            for band in self._bands(shingles):
+                candidates |= self._buckets.get((pair, band), set())
+
+        best, best_score = None, 0.0
+        for entry_id in candidates:
+            entry = self._entries[entry_id]
+            score = 1.0 if entry_id == exact else _jaccard(shingles, _shingles(entry.masked))
+            if score > best_score:
+                best, best_score = entry, score
+        if best is None or best_score < self.threshold:
+            self.misses += 1
+            return None
+
+        output = _substitute_numbers(best.output, best.numbers, numbers)
+        if output is None:
+            self.rejected += 1
+            return None
+        self.hits += 1
+        return output
+
+    async def rebuild(self) -> None:
+        """Заполняет память последними строками translations (новые записи важнее)."""
+        query = (
+            select(Translation.source_lang, Translation.target_lang, Translation.input_text, Translation.output_text)
+            .order_by(Translation.timestamp.desc())
+            .limit(self.max_entries)
+            .execution_options(yield_per=1000)
+        )
+        rows, seen = [], set()
+        async with read_session() as db:
+            result = await db.stream(query)
+            async for source_lang, target_lang, input_text, output_text in result:
+                key = (source_lang, target_lang, _masked(input_text))
+                if key not in seen:
+                    seen.add(key)
+                    rows.append((source_lang, target_lang, input_text, output_text))
+        # от старых к новым, чтобы вытеснялись старые; записи, добавленные
+        # во время перестроения, свежее строк из БД и не перезаписываются
+        for i, row in enumerate(reversed(rows)):
+            self.add(*row, replace=False)
+            if i % 500 == 499:
+                await asyncio.sleep(0)
+        logger.info("Translation memory rebuilt: %s entries", len(self._entries))
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "rejected": self.rejected,
+        }
+
+
+@lru_cache()
+def get_translation_memory() -> Optional[TranslationMemory]:
+    settings = get_settings()
+    if not settings.TM_ENABLED:
+        return None
+    return TranslationMemory(
+        threshold=settings.TM_THRESHOLD,
+        max_entries=settings.TM_MAX_ENTRIES,
+        max_chars=settings.SEGMENT_MAX_CHARS,
+        num_perm=settings.TM_NUM_PERM,
+        bands=settings.TM_BANDS,
+    )
+
+
+def start_translation_memory() -> Optional[asyncio.Task]:
+    memory = get_translation_memory()
+    if memory is None:
+        return None
+    return asyncio.create_task(memory.rebuild())
@@ -1,13 +1,13 @@
+import asyncio
 from dataclasses import dataclass
-from typing import List
+from typing import Awaitable, Callable, List, Optional
 from datetime import datetime
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from models.transaction import Transaction
-from models.translation import Translation
-from models.user import User
-
-import uuid
+from services.batcher import get_batcher
+from services.billing import refund, reserve, settle, translation_row
+from services.metrics import IN_FLIGHT, stage
+from services.model_registry import SUPPORTED_MODELS, get_model_registry
+from services.segmenter import translate_segmented
 
 
 
@@ -20,99 +20,99 @@ class TextValidationResult:
 
 @dataclass
 class Model:
-    SUPPORTED_MODELS = {
-        ("en", "fr"): "Helsinki-NLP/opus-mt-en-fr",
-        ("fr", "en"): "Helsinki-NLP/opus-mt-fr-en"
-    }
+    SUPPORTED_MODELS = SUPPORTED_MODELS
 
     def translate(self, origin_text: str, source_lang: str, target_lang: str) -> str:
-        from transformers import pipeline
-
         if (source_lang, target_lang) not in self.SUPPORTED_MODELS:
             raise ValueError("Модель перевода не поддерживается")
 
-        model_name = self.SUPPORTED_MODELS[(source_lang, target_lang)]
-        translator = pipeline("translation", model=model_name)
+        translator = get_model_registry().get((source_lang, target_lang))
         return translator(origin_text)[0]["translation_text"]
 
+    async def atranslate(self, origin_text: str, source_lang: str, target_lang: str) -> str:
+        """Перевод через микробатчер: конкурентные запросы пары идут одним вызовом модели."""
+        if (source_lang, target_lang) not in self.SUPPORTED_MODELS:
+            raise ValueError("Модель перевода не поддерживается")
+
+        return await get_batcher((source_lang, target_lang)).submit(origin_text)
+
 
 @dataclass
 class TranslationRequest:
-    user: User
+    user_id: str
     input_text: str
     source_lang: str
     target_lang: str
     model: Model
     cost: int = 1
+    # выполняется в транзакции расчёта: её изменения фиксируются вместе со списанием
+    on_settle: Optional[Callable[[AsyncSession, str], Awaitable[None]]] = None
 
     async def process(self, db: AsyncSession) -> str:
-        if self.user.wallet is None or self.user.wallet.balance < self.cost:
-            raise ValueError("Недостаточно средств на балансе")
-
-        output_text = self.model.translate(
-            origin_text=self.input_text,
-            source_lang=self.source_lang,
-            target_lang=self.target_lang,
-        )
-
-        self.user.wallet.balance -= self.cost
-        db.add(self.user.wallet)
-
-        translation = Translation(
-            user_id=self.user.id,
-            input_text=self.input_text,
-            output_text=output_text,
-            source_lang=self.source_lang,
-            target_lang=self.target_lang,
-            cost=self.cost,
-        )
-        db.add(translation)
-
-        await db.commit()
-        return output_text
-
-
-
+        """
+        Резерв -> инференс без соединения с БД -> одна транзакция расчёта.
+        При ошибке перевода или расчёта резерв возвращается на счёт.
+        """
+        if (self.source_lang, self.target_lang) not in self.model.SUPPORTED_MODELS:
+            raise ValueError("Модель перевода не поддерживается")
 
-async def process_translation_request(db: AsyncSession, user_id: str, data) -> dict:
+        with IN_FLIGHT.track_inprogress():
+            # 1) атомарный резерв, соединение сразу возвращается в пул
+            with stage("reserve"):
+                await reserve(db, self.user_id, self.cost)
+
+            # 2) инференс
+            try:
+                with stage("inference"):
+                    output_text = await translate_segmented(
+                        self.input_text,
+                        self.source_lang,
+                        self.target_lang,
+                        lambda segment: self.model.atranslate(
+                            origin_text=segment,
+                            source_lang=self.source_lang,
+                            target_lang=self.target_lang,
+                        ),
+                    )
+            except BaseException:
+                await asyncio.shield(refund(self.user_id, self.cost))
+                raise
+
+            # 3) расчёт: история перевода и запись списания одним commit
+            with stage("settle"):
+                if self.on_settle is not None:
+                    await self.on_settle(db, output_text)
+                await settle(db, self.user_id, self.cost, [translation_row(
+                    self.user_id,
+                    self.input_text,
+                    output_text,
+                    self.source_lang,
+                    self.target_lang,
+                    self.cost,
+                )])
+            return output_text
+
+
+async def process_translation_request(db: AsyncSession, user_id: str, data, on_settle=None) -> dict:
     """
     Обёртка для роутера:
-    - ищет пользователя
-    - вызывает TranslationRequest.process(...)
-    - пишет Transaction (Списание)
+    - собирает TranslationRequest
+    - вызывает TranslationRequest.process(...) (резерв, перевод, расчёт)
     - возвращает payload для ответа
     """
-    # 1) достаём пользователя
-    res = await db.execute(select(User).where(User.id == user_id))
-    user = res.scalar_one_or_none()
-    if not user:
-        raise ValueError("User not found")
-
-    # 2) собираем запрос и обрабатываем
     req = TranslationRequest(
-        user=user,
+        user_id=user_id,
         input_text=data.input_text if hasattr(data, "input_text") else data["input_text"],
         source_lang=data.source_lang if hasattr(data, "source_lang") else data["source_lang"],
         target_lang=data.target_lang if hasattr(data, "target_lang") else data["target_lang"],
         model=Model(),
         cost=1,
+        on_settle=on_settle,
     )
     output_text = await req.process(db)
 
-    # 3) логируем транзакцию (история списаний)
-    tx = Transaction(
-        id=str(uuid.uuid4()),
-        timestamp=datetime.utcnow(),
-        user_id=user_id,
-        amount=req.cost,
-        type="Списание",
-    )
-    db.add(tx)
-    await db.commit()
-
-    # 4) отдаём ответ
     return {
         "output_text": output_text,
         "cost": req.cost,
         "timestamp": datetime.utcnow().isoformat(),
-    }
\ No newline at end of file
+    }
@@ -0,0 +1,103 @@
+import asyncio
+import json
+from datetime import datetime
+from typing import AsyncIterator, Awaitable, Callable
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database.config import get_settings
+from database.database import async_session
+from services.billing import refund, reserve, settle, translation_row
+from services.metrics import IN_FLIGHT
+from services.segmenter import split_text
+from services.translation_cache import document_hash, get_translation_cache
+from services.translation_request import Model
+
+COST = 1
+
+
+async def reserve_for_stream(db: AsyncSession, user_id: str, data, cost: int = COST) -> None:
+    """Проверки и резерв до начала стрима: после первого байта статус ответа уже не поменять."""
+    if (data.source_lang, data.target_lang) not in Model.SUPPORTED_MODELS:
+        raise ValueError("Модель перевода не поддерживается")
+    await reserve(db, user_id, cost)
+
+
+def _line(payload: dict) -> str:
+    return json.dumps(payload, ensure_ascii=False) + "\n"
+
+
+async def stream_translation(
+    user_id: str,
+    data,
+    is_disconnected: Callable[[], Awaitable[bool]],
+    cost: int = COST,
+) -> AsyncIterator[str]:
+    """
+    NDJSON-стрим перевода (резерв уже сделан reserve_for_stream):
+    - по строке на каждый готовый сегмент (склейка output_text даёт весь перевод)
+    - расчёт и запись истории один раз в конце
+    - при отключении клиента оставшиеся сегменты отменяются (если их не ждут
+      другие запросы), резерв возвращается
+    """
+    model = Model()
+    cache = get_translation_cache()
+    source_lang, target_lang = data.source_lang, data.target_lang
+    pieces = split_text(data.input_text, get_settings().SEGMENT_MAX_CHARS)
+    segments = [value for value, translatable in pieces if translatable]
+
+    # тот же путь, что у /translate: кэш, single-flight и память переводов;
+    # все сегменты сразу уходят в батчер, а отдаются по порядку
+    tasks = {
+        i: asyncio.ensure_future(cache.get_or_translate(
+            source_lang, target_lang, value,
+            lambda v=value: model.atranslate(v, source_lang, target_lang),
+            persistent=len(segments) == 1,
+        ))
+        for i, (value, translatable) in enumerate(pieces)
+        if translatable
+    }
+
+    settled = False
+    IN_FLIGHT.inc()
+    try:
+        outputs = []
+        chunk = ""
+        segment = 0
+        for i, (value, translatable) in enumerate(pieces):
+            if not translatable:
+                chunk += value
+                continue
+            if await is_disconnected():
+                return
+            chunk += await tasks[i]
+            yield _line({"segment": segment, "output_text": chunk})
+            outputs.append(chunk)
+            chunk = ""
+            segment += 1
+        outputs.append(chunk)
+        output_text = "".join(outputs)
+        if len(segments) > 1:
+            cache.put((source_lang, target_lang, document_hash(data.input_text)), output_text)
+
+        # дальше резерв возвращает сам settle, если расчёт не прошёл
+        settled = True
+        async with async_session() as db:
+            await settle(db, user_id, cost, [translation_row(
+                user_id, data.input_text, output_text, source_lang, target_lang, cost
+            )])
+
+        yield _line({
+            "done": True,
+            "output_text": output_text,
+            "cost": cost,
+            "timestamp": datetime.utcnow().isoformat(),
+        })
+    except Exception as exc:
+        yield _line({"error": str(exc)})
+    finally:
+        IN_FLIGHT.dec()
+        for task in tasks.values():
+            task.cancel()
+        if not settled:
+            await asyncio.shield(refund(user_id, cost))
@@ -0,0 +1,152 @@
+import asyncio
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional
+
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database.config import get_settings
+from database.database import engine
+from models.user import User
+from models.wallet import Wallet
+
+logger = logging.getLogger(__name__)
+
+NOTIFY_CHANNEL = "user_cache_invalidate"
+# метка процесса в уведомлении, чтобы не сбрасывать только что обновлённые свои записи
+_ORIGIN = uuid.uuid4().hex
+
+
+@dataclass
+class CachedUser:
+    is_admin: bool
+    tier: str
+    balance: Optional[int]
+    expires_at: float
+
+
+class UserCache:
+    """
+    Read-through кэш горячих строк: существование пользователя, флаг админа, тариф и баланс.
+    Записи обновляются сразу после изменений баланса (write-through); другие
+    воркеры узнают об изменениях через Postgres LISTEN/NOTIFY (USER_CACHE_NOTIFY).
+    """
+
+    def __init__(self, ttl_seconds: int, max_entries: int, notify: bool):
+        self.ttl = ttl_seconds
+        self.max_entries = max_entries
+        self.notify = notify
+        self._entries: "OrderedDict[str, CachedUser]" = OrderedDict()
+        # время последнего изменения: чтение, начатое раньше, не перезапишет свежий баланс
+        self._written: "OrderedDict[str, float]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    async def get(self, db: AsyncSession, user_id: str) -> Optional[CachedUser]:
+        """None, если пользователя нет."""
+        entry = self._entries.get(user_id)
+        if entry is not None and entry.expires_at >= time.monotonic():
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+            return entry
+
+        self.misses += 1
+        started = time.monotonic()
+        row = (await db.execute(
+            select(User.is_admin, User.tier, Wallet.balance)
+            .outerjoin(Wallet, Wallet.user_id == User.id)
+            .where(User.id == user_id)
+        )).one_or_none()
+        if row is None:
+            self._entries.pop(user_id, None)
+            return None
+        entry = CachedUser(bool(row.is_admin), row.tier, row.balance, 0.0)
+        if self._written.get(user_id, 0.0) >= started:
+            return entry
+        return self._store(user_id, entry)
+
+    def _store(self, user_id: str, entry: CachedUser) -> CachedUser:
+        entry.expires_at = time.monotonic() + self.ttl
+        self._entries[user_id] = entry
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return entry
+
+    def set_balance(self, user_id: str, balance: int) -> None:
+        """Write-through после commit: известный новый баланс."""
+        self._mark_written(user_id)
+        entry = self._entries.get(user_id)
+        if entry is not None:
+            entry.balance = balance
+            self._store(user_id, entry)
+
+    def invalidate(self, user_id: str) -> None:
+        self._mark_written(user_id)
+        if self._entries.pop(user_id, None) is not None:
+            self.invalidations += 1
+
+    def _mark_written(self, user_id: str) -> None:
+        self._written[user_id] = time.monotonic()
+        self._written.move_to_end(user_id)
+        while len(self._written) > self.max_entries:
+            self._written.popitem(last=False)
+
+    async def publish(self, db: AsyncSession, user_id: str) -> None:
+        """
+        Вызывается до commit: pg_notify доставляется остальным воркерам
+        только вместе с фиксацией транзакции.
+        """
+        if self.notify:
+            await db.execute(
+                text("SELECT pg_notify(:channel, :payload)"),
+                {"channel": NOTIFY_CHANNEL, "payload": f"{_ORIGIN}:{user_id}"},
+            )
+
+    async def listen(self) -> None:
+        """Держит отдельное соединение и сбрасывает записи по уведомлениям других воркеров."""
+        async with engine.connect() as conn:
+            raw = await conn.get_raw_connection()
+            driver = raw.driver_connection
+
+            def on_notify(connection, pid, channel, payload):
+                origin, _, user_id = payload.partition(":")
+                if origin != _ORIGIN:
+                    self.invalidate(user_id)
+
+            await driver.add_listener(NOTIFY_CHANNEL, on_notify)
+            try:
+                await asyncio.Future()
+            finally:
+                await driver.remove_listener(NOTIFY_CHANNEL, on_notify)
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+        }
+
+
+@lru_cache()
+def get_user_cache() -> UserCache:
+    settings = get_settings()
+    return UserCache(
+        ttl_seconds=settings.USER_CACHE_TTL_SECONDS,
+        max_entries=settings.USER_CACHE_MAX_ENTRIES,
+        notify=settings.USER_CACHE_NOTIFY,
+    )
+
+
+def start_user_cache_listener() -> Optional[asyncio.Task]:
+    cache = get_user_cache()
+    if not cache.notify:
+        return None
+    return asyncio.create_task(cache.listen())
@@ -0,0 +1,78 @@
+import asyncio
+import logging
+import time
+from typing import List
+
+from database.config import get_settings
+from services.backends import backend_for
+from services.inference_executor import get_inference_executor
+from services.model_registry import SUPPORTED_MODELS, LanguagePair, translate_batch
+
+logger = logging.getLogger(__name__)
+
+
+class Readiness:
+    """Состояние прогрева воркера для /ready."""
+
+    status = "starting"  # starting, warming, ready, failed
+    error = None
+    warmed: dict = {}
+
+    @classmethod
+    def is_ready(cls) -> bool:
+        return cls.status == "ready"
+
+    @classmethod
+    def as_dict(cls) -> dict:
+        return {"status": cls.status, "error": cls.error, "warmed": cls.warmed}
+
+
+def parse_pairs(value: str) -> List[LanguagePair]:
+    pairs = []
+    for item in filter(None, (part.strip() for part in value.split(","))):
+        src, _, tgt = item.partition("-")
+        if (src, tgt) not in SUPPORTED_MODELS:
+            raise ValueError(f"Unsupported preload pair: {item}")
+        pairs.append((src, tgt))
+    return pairs
+
+
+def _import_ml_stack() -> None:
+    import torch  # noqa: F401
+    from transformers import pipeline  # noqa: F401
+
+
+def _warm_pair(pair: LanguagePair, text: str) -> float:
+    # загрузка в реестр + первый инференс (аллокации и ленивые инициализации torch)
+    started = time.perf_counter()
+    translate_batch(pair, [text])
+    return time.perf_counter() - started
+
+
+async def warm_up() -> None:
+    settings = get_settings()
+    Readiness.status = "warming"
+    try:
+        pairs = parse_pairs(settings.PRELOAD_MODEL_PAIRS)
+        executor = get_inference_executor()
+        # в process pool у каждого процесса свой реестр: греем каждый
+        copies = executor.workers if executor.kind == "process" else 1
+
+        if any(backend_for(pair).name != "fake" for pair in pairs):
+            await asyncio.to_thread(_import_ml_stack)
+        for src, tgt in pairs:
+            seconds = await asyncio.gather(*(
+                executor.run(_warm_pair, (src, tgt), settings.WARMUP_TEXT) for _ in range(copies)
+            ))
+            Readiness.warmed[f"{src}-{tgt}"] = round(max(seconds), 3)
+            logger.info("Warmed up %s-%s in %.2fs", src, tgt, max(seconds))
+    except Exception as exc:
+        logger.exception("Model warmup failed")
+        Readiness.status = "failed"
+        Readiness.error = str(exc)
+        return
+    Readiness.status = "ready"
+
+
+def start_warmup() -> asyncio.Task:
+    return asyncio.create_task(warm_up())
@@ -0,0 +1,55 @@
+import asyncio
+import os
+import sys
+import tempfile
+import uuid
+
+import pytest
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIR)
+
+# тесты не требуют PostgreSQL и моделей; файл, а не :memory:, чтобы все соединения пула видели одну базу
+_DB_DIR = tempfile.mkdtemp(prefix="ml_tests_")
+os.environ.setdefault("DB_URL", f"sqlite+aiosqlite:///{os.path.join(_DB_DIR, 'test.db')}")
+os.environ.setdefault("MODEL_BACKEND", "fake")
+os.environ.setdefault("FAKE_BACKEND_LATENCY_MS", "0")
+os.environ.setdefault("FAKE_BACKEND_LATENCY_PER_TEXT_MS", "0")
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+async def _create_user(balance: int, is_admin: bool = False) -> str:
+    from database.database import Base, async_session, engine
+    from models import idempotency, job, transaction, translation  # noqa: F401  таблицы в Base.metadata
+    from models.user import User
+    from models.wallet import Wallet
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    user_id = str(uuid.uuid4())
+    async with async_session() as db:
+        # без bcrypt: пароль в этих тестах не проверяется
+        db.add(User(id=user_id, email=f"{user_id}@example.com", _password_hash="-", is_admin=is_admin,
+                    wallet=Wallet(balance=balance)))
+        await db.commit()
+    await engine.dispose()
+    return user_id
+
+
+async def wallet_balance(user_id: str) -> int:
+    from sqlalchemy import select
+    from database.database import async_session, engine
+    from models.wallet import Wallet
+
+    async with async_session() as db:
+        balance = (await db.execute(select(Wallet.balance).where(Wallet.user_id == user_id))).scalar_one()
+    await engine.dispose()
+    return balance
+
+
+@pytest.fixture
+def make_user():
+    return lambda balance=10, is_admin=False: run(_create_user(balance, is_admin))
@@ -0,0 +1,27 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from routers.admin import router
+from utils.tokens import SessionToken
+
+
+def _client() -> TestClient:
+    app = FastAPI()
+    app.include_router(router)
+    return TestClient(app)
+
+
+def test_admin_rejects_unsigned_user_id_header(make_user):
+    admin_id = make_user(is_admin=True)
+    with _client() as client:
+        assert client.get("/admin/profiles", headers={"X-User-Id": admin_id}).status_code == 401
+
+
+def test_admin_accepts_session_token(make_user):
+    admin_id = make_user(is_admin=True)
+    user_id = make_user()
+    with _client() as client:
+        ok = client.get("/admin/profiles", headers={"Authorization": f"Bearer {SessionToken.issue(admin_id)}"})
+        forbidden = client.get("/admin/profiles", headers={"Authorization": f"Bearer {SessionToken.issue(user_id)}"})
+    assert ok.status_code == 200
+    assert forbidden.status_code == 403
@@ -0,0 +1,43 @@
+import asyncio
+
+import pytest
+
+from database.database import async_session, engine
+from services import billing
+from tests.conftest import run, wallet_balance
+
+
+async def _reserve_then_failing_settle(user_id: str) -> None:
+    try:
+        async with async_session() as db:
+            await billing.reserve(db, user_id, 3)
+            row = billing.translation_row(user_id, "Hello", "Bonjour", "en", "fr", 3)
+            row["output_text"] = None  # NOT NULL: INSERT истории падает до commit
+            await billing.settle(db, user_id, 3, [row])
+    finally:
+        await engine.dispose()
+
+
+def test_failed_settle_refunds_reservation(make_user):
+    user_id = make_user(balance=10)
+    with pytest.raises(Exception):
+        run(_reserve_then_failing_settle(user_id))
+    assert run(wallet_balance(user_id)) == 10
+
+
+async def _concurrent_deposits(user_id: str, count: int) -> list:
+    async def one() -> int:
+        async with async_session() as db:
+            return await billing.deposit(db, user_id, 1, "Пополнение")
+
+    try:
+        return await asyncio.gather(*(one() for _ in range(count)))
+    finally:
+        await engine.dispose()
+
+
+def test_concurrent_deposits_are_not_lost(make_user):
+    user_id = make_user(balance=0)
+    balances = run(_concurrent_deposits(user_id, 5))
+    assert sorted(balances) == [1, 2, 3, 4, 5]
+    assert run(wallet_balance(user_id)) == 5
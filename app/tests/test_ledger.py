@@ -0,0 +1,53 @@
+import asyncio
+
+from sqlalchemy import func, select
+
+from database.database import async_session, engine
+from models.transaction import Transaction
+from services.ledger import LedgerBuffer
+from tests.conftest import run
+from utils.clock import UtcClock
+
+
+def _transaction(user_id: str, id: str) -> dict:
+    return {"id": id, "timestamp": UtcClock.now(), "user_id": user_id, "amount": 1, "type": "Списание"}
+
+
+async def _flush_with_bad_row(user_id: str):
+    ledger = LedgerBuffer(flush_interval_ms=10, flush_rows=100, max_rows=100)
+    good = [_transaction(user_id, f"{user_id}-{i}") for i in range(5)]
+    bad = dict(good[0], user_id=None)  # NOT NULL: строку отвергает БД
+    await ledger.add(Transaction, good[:3] + [bad] + good[3:])
+    try:
+        await ledger.flush()
+        async with async_session() as db:
+            count = (await db.execute(
+                select(func.count()).select_from(Transaction).where(Transaction.user_id == user_id)
+            )).scalar_one()
+    finally:
+        await engine.dispose()
+    return ledger, count
+
+
+def test_rejected_row_is_quarantined_and_rest_written(make_user):
+    user_id = make_user()
+    ledger, count = run(_flush_with_bad_row(user_id))
+    assert count == 5
+    assert ledger.stats()["quarantined"] == 1
+    assert ledger.stats()["buffered_rows"] == 0
+
+
+async def _add_over_cap() -> bool:
+    ledger = LedgerBuffer(flush_interval_ms=10, flush_rows=100, max_rows=2)
+    ledger._task = asyncio.ensure_future(asyncio.sleep(3600))  # фоновый сброс «завис»
+    await ledger.add(Transaction, [{}, {}])
+    blocked = asyncio.ensure_future(ledger.add(Transaction, [{}]))
+    await asyncio.sleep(0.01)
+    result = not blocked.done() and ledger.stats()["buffered_rows"] == 2
+    blocked.cancel()
+    ledger._task.cancel()
+    return result
+
+
+def test_add_waits_when_buffer_is_full():
+    assert run(_add_over_cap()) is True
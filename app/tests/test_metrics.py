@@ -0,0 +1,13 @@
+import os
+import subprocess
+import sys
+
+from tests.conftest import APP_DIR
+
+
+def test_import_main_without_multiproc_dir():
+    env = {k: v for k, v in os.environ.items() if k != "PROMETHEUS_MULTIPROC_DIR"}
+    result = subprocess.run(
+        [sys.executable, "-c", "import main, worker"], cwd=APP_DIR, env=env, capture_output=True, text=True
+    )
+    assert result.returncode == 0, result.stderr
@@ -0,0 +1,43 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException, Response
+
+import deps
+from database.config import get_settings
+from services.rate_limit import FairQueue, get_rate_limiter, tier_limits
+from services.user_cache import CachedUser
+
+
+@pytest.fixture
+def rate_limited(monkeypatch):
+    monkeypatch.setattr(get_settings(), "RATE_LIMIT_ENABLED", True)
+
+    class _Cache:
+        async def get(self, db, user_id):
+            return CachedUser(is_admin=False, tier="free", balance=100, expires_at=0.0)
+
+    monkeypatch.setattr(deps, "get_user_cache", lambda: _Cache())
+    get_rate_limiter.cache_clear()
+    yield
+    get_rate_limiter.cache_clear()
+
+
+def test_batch_larger_than_burst_is_rejected_with_400(rate_limited):
+    burst = tier_limits("free").burst
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(deps.enforce_rate_limit("u1", Response(), cost=burst + 1))
+    assert exc.value.status_code == 400
+
+
+def test_batch_equal_to_burst_is_allowed(rate_limited):
+    burst = tier_limits("free").burst
+    response = Response()
+    asyncio.run(deps.enforce_rate_limit("u2", response, cost=burst))
+    assert response.headers["X-RateLimit-Remaining"] == "0"
+
+
+def test_queue_position_ignores_own_segments():
+    queue = FairQueue()
+    assert [queue.push(i, flow="a", weight=1.0, cost=10) for i in range(3)] == [0, 0, 0]
+    assert queue.push("b0", flow="b", weight=1.0, cost=10) == 1
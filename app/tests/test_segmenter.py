@@ -0,0 +1,13 @@
+from services.segmenter import translate_segmented
+from tests.conftest import run
+
+
+async def _fake_translate(segment: str) -> str:
+    return f"[fr] {segment}"
+
+
+def test_whitespace_survives_whole_text_cache():
+    flat = "Hello there. How are you?"
+    paragraphs = "Hello there.\n\nHow are you?"
+    assert run(translate_segmented(flat, "en", "fr", _fake_translate)) == "[fr] Hello there. [fr] How are you?"
+    assert run(translate_segmented(paragraphs, "en", "fr", _fake_translate)) == "[fr] Hello there.\n\n[fr] How are you?"
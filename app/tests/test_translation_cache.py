@@ -0,0 +1,34 @@
+import asyncio
+
+from services.translation_cache import TranslationCache
+
+
+async def _cancel_waiters(waiters: int) -> bool:
+    cache = TranslationCache(max_entries=10, ttl_seconds=60, persistent=False)
+    started, cancelled = asyncio.Event(), asyncio.Event()
+
+    async def translate():
+        started.set()
+        try:
+            await asyncio.sleep(3600)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    tasks = [asyncio.ensure_future(cache.get_or_translate("en", "fr", "Hello", translate)) for _ in range(waiters)]
+    await started.wait()
+    tasks[0].cancel()
+    await asyncio.sleep(0.01)
+    result = cancelled.is_set()
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    return result
+
+
+def test_last_waiter_leaving_cancels_inference():
+    assert asyncio.run(_cancel_waiters(1)) is True
+
+
+def test_inference_kept_while_other_waiters_remain():
+    assert asyncio.run(_cancel_waiters(2)) is False
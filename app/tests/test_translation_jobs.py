@@ -0,0 +1,54 @@
+from datetime import timedelta
+
+from sqlalchemy import select
+
+from database.database import async_session, engine
+from models.job import TranslationJob
+from services import translation_jobs
+from tests.conftest import run, wallet_balance
+from utils.clock import UtcClock
+
+
+async def _add_job(user_id: str, claimed_ago: float, reserved: int) -> str:
+    async with async_session() as db:
+        job = TranslationJob(
+            user_id=user_id, input_text="Hello", source_lang="en", target_lang="fr", status="running",
+            claimed_at=UtcClock.now() - timedelta(seconds=claimed_ago), reserved=reserved,
+        )
+        db.add(job)
+        await db.commit()
+        job_id = job.id
+    await engine.dispose()
+    return job_id
+
+
+async def _handle(job_id: str) -> TranslationJob:
+    try:
+        await translation_jobs.handle_job({"job_id": job_id})
+        async with async_session() as db:
+            return (await db.execute(select(TranslationJob).where(TranslationJob.id == job_id))).scalar_one()
+    finally:
+        await engine.dispose()
+
+
+def test_expired_lease_refunds_reservation_and_reruns(make_user):
+    # воркер упал после резерва: на счёте 9 из 10, в задаче отмечен резерв
+    user_id = make_user(balance=9)
+    job_id = run(_add_job(user_id, claimed_ago=3600, reserved=1))
+
+    job = run(_handle(job_id))
+
+    assert job.status == "done"
+    assert job.output_text
+    assert job.reserved == 0
+    assert run(wallet_balance(user_id)) == 9  # резерв возвращён, перевод списан один раз
+
+
+def test_leased_job_is_not_taken_twice(make_user):
+    user_id = make_user(balance=9)
+    job_id = run(_add_job(user_id, claimed_ago=0, reserved=1))
+
+    job = run(_handle(job_id))
+
+    assert job.status == "running"
+    assert run(wallet_balance(user_id)) == 9
@@ -0,0 +1,12 @@
+from datetime import datetime, timezone
+
+
+class UtcClock:
+    @staticmethod
+    def now() -> datetime:
+        """
+        Текущее время UTC для колонок timestamp без часового пояса: по нему
+        же считаются границы месячных партиций, поэтому локальный пояс хоста
+        не должен влиять. asyncpg не принимает aware-значения для такого типа.
+        """
+        return datetime.now(timezone.utc).replace(tzinfo=None)
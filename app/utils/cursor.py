@@ -0,0 +1,21 @@
+import base64
+from datetime import datetime
+from typing import Tuple
+
+
+class KeysetCursor:
+    """Непрозрачный курсор keyset-пагинации по (timestamp, id)."""
+
+    @staticmethod
+    def encode(timestamp: datetime, id: str) -> str:
+        raw = f"{timestamp.isoformat()}|{id}".encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+    @staticmethod
+    def decode(cursor: str) -> Tuple[datetime, str]:
+        try:
+            raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+            timestamp, id = raw.split("|", 1)
+            return datetime.fromisoformat(timestamp), id
+        except ValueError:
+            raise ValueError("Некорректный курсор")
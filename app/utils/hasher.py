@@ -1,10 +1,38 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
 import bcrypt
 
+from database.config import get_settings
+
+
 class PasswordHasher:
+    _executor: Optional[ThreadPoolExecutor] = None
+
     @staticmethod
     def hash(password: str) -> str:
-        return bcrypt.hashpw(password.encode(), bcrypt.gensalt()).decode()
+        rounds = get_settings().BCRYPT_ROUNDS
+        return bcrypt.hashpw(password.encode(), bcrypt.gensalt(rounds=rounds)).decode()
 
     @staticmethod
     def check(password: str, hashed: str) -> bool:
         return bcrypt.checkpw(password.encode(), hashed.encode())
+
+    # bcrypt отпускает GIL, поэтому пул потоков разгружает event loop;
+    # число потоков ограничивает, сколько ядер уходит на хэширование
+    @classmethod
+    async def hash_async(cls, password: str) -> str:
+        return await cls._run(cls.hash, password)
+
+    @classmethod
+    async def check_async(cls, password: str, hashed: str) -> bool:
+        return await cls._run(cls.check, password, hashed)
+
+    @classmethod
+    async def _run(cls, fn, *args):
+        if cls._executor is None:
+            cls._executor = ThreadPoolExecutor(
+                max_workers=get_settings().AUTH_HASH_WORKERS, thread_name_prefix="bcrypt"
+            )
+        return await asyncio.get_running_loop().run_in_executor(cls._executor, fn, *args)
@@ -0,0 +1,26 @@
+import os
+
+
+class ProcessMemory:
+    @staticmethod
+    def snapshot() -> dict:
+        """
+        RSS/PSS и общий/приватный объём текущего процесса в байтах (Linux).
+        PSS делит общие страницы между процессами, поэтому сумма PSS воркеров
+        показывает реальный расход памяти при общих весах моделей.
+        """
+        fields = {
+            "Rss": "rss", "Pss": "pss",
+            "Shared_Clean": "shared_clean", "Shared_Dirty": "shared_dirty",
+            "Private_Clean": "private_clean", "Private_Dirty": "private_dirty",
+        }
+        result = {"pid": os.getpid()}
+        try:
+            with open("/proc/self/smaps_rollup") as f:
+                for line in f:
+                    key, _, value = line.partition(":")
+                    if key in fields:
+                        result[fields[key]] = int(value.split()[0]) * 1024
+        except OSError:
+            pass
+        return result
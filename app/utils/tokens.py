@@ -0,0 +1,55 @@
+import base64
+import hashlib
+import hmac
+import logging
+import secrets
+import time
+from typing import Optional
+
+from database.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+class SessionToken:
+    """
+    Подписанный HMAC-SHA256 токен сессии "<user_id>.<expires>.<signature>".
+    Проверяется в памяти, без обращения к БД.
+    """
+
+    _fallback_secret: Optional[bytes] = None
+
+    @staticmethod
+    def _secret() -> bytes:
+        secret = get_settings().SESSION_SECRET
+        if secret:
+            return secret.encode()
+        if SessionToken._fallback_secret is None:
+            logger.warning("SESSION_SECRET is not set, tokens are valid only for this process")
+            SessionToken._fallback_secret = secrets.token_bytes(32)
+        return SessionToken._fallback_secret
+
+    @staticmethod
+    def _sign(payload: str) -> str:
+        digest = hmac.new(SessionToken._secret(), payload.encode(), hashlib.sha256).digest()
+        return base64.urlsafe_b64encode(digest).decode().rstrip("=")
+
+    @staticmethod
+    def issue(user_id: str, ttl_seconds: Optional[int] = None) -> str:
+        ttl = ttl_seconds if ttl_seconds is not None else get_settings().SESSION_TTL_SECONDS
+        payload = f"{user_id}.{int(time.time()) + ttl}"
+        return f"{payload}.{SessionToken._sign(payload)}"
+
+    @staticmethod
+    def verify(token: str) -> Optional[str]:
+        """Возвращает user_id или None, если подпись неверна или срок истёк."""
+        try:
+            user_id, expires, signature = token.rsplit(".", 2)
+            expires_at = int(expires)
+        except ValueError:
+            return None
+        if not hmac.compare_digest(signature, SessionToken._sign(f"{user_id}.{expires}")):
+            return None
+        if expires_at < time.time():
+            return None
+        return user_id
@@ -0,0 +1,34 @@
+# worker.py: потребитель очереди задач перевода (python worker.py)
+import asyncio
+import logging
+
+from database.config import get_settings
+from services.archive import maintenance_loop
+from services.broker import get_broker
+from services.inference_executor import shutdown_inference_executor
+from services.ledger import get_ledger
+from services.translation_jobs import handle_job, job_lease_loop
+
+
+async def main():
+    settings = get_settings()
+    broker = get_broker()
+    ledger = get_ledger()
+    if ledger is not None:
+        ledger.start()
+    maintenance = asyncio.create_task(maintenance_loop(archive=settings.ARCHIVE_ENABLED))
+    lease = asyncio.create_task(job_lease_loop())
+    try:
+        await broker.consume(handle_job, concurrency=settings.JOBS_CONCURRENCY)
+    finally:
+        maintenance.cancel()
+        lease.cancel()
+        await broker.close()
+        shutdown_inference_executor()
+        if ledger is not None:
+            await ledger.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())